@@ -0,0 +1,55 @@
+"""
+Отзывчивость event loop при параллельной отрисовке графиков прогресса:
+синхронный рендер в event loop против пула процессов.
+
+    python benchmarks/bench_chart.py [графиков] [процессов]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import chart
+
+USER = {'logged_water': 1200, 'water_goal': 2500, 'logged_calories': 1500, 'burned_calories': 400}
+
+async def monitor_lag(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def inline_render(user: dict):
+    chart.render_progress_chart(user['logged_water'], user['water_goal'],
+                                user['logged_calories'], user['burned_calories'])
+
+async def run(label: str, render, count: int):
+    stop, lags = asyncio.Event(), []
+    monitor = asyncio.create_task(monitor_lag(stop, lags))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*[render(USER) for _ in range(count)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    print(f"{label:<7} {count / elapsed:6.1f} charts/sec | "
+          f"max loop lag {max(lags, default=0) * 1000:7.1f} ms")
+
+async def main(count: int, workers: int):
+    await run("inline", inline_render, count)
+    
+    chart.config.CHART_QUEUE_SIZE = count
+    chart.config.CHART_TIMEOUT = 600
+    chart.start_chart_pool(workers)
+    try:
+        await chart.create_progress_chart(USER)
+        await run("pool", chart.create_progress_chart, count)
+    finally:
+        chart.stop_chart_pool()
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 2
+    asyncio.run(main(count, workers))
@@ -0,0 +1,46 @@
+"""
+Сравнение ops/sec: соединение на каждый вызов против пула соединений.
+
+    python benchmarks/bench_db_pool.py [операций]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+USERS = 100
+
+async def workload(ops: int):
+    for i in range(ops):
+        user_id = i % USERS
+        await database.log_water(user_id, 250)
+        await database.get_user(user_id)
+
+async def run(label: str, ops: int):
+    start = time.perf_counter()
+    await workload(ops)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {ops * 2 / elapsed:10.0f} ops/sec ({elapsed:.2f} s)")
+
+async def main(ops: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        await database.init_db()
+        for user_id in range(USERS):
+            await database.create_or_update_user({'user_id': user_id, 'weight': 70, 'water_goal': 2500})
+
+        await run("per-call", ops)
+
+        await database.open_pool(database.DB_PATH)
+        try:
+            await run("pool", ops)
+        finally:
+            await database.close_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,229 @@
+"""
+Сквозной нагрузочный тест: настоящий Dispatcher со всеми роутерами, FSM-хранилищем,
+пулами БД и графиков против локальных заглушек Telegram Bot API, OpenFoodFacts
+и OpenWeather. Виртуальные пользователи проходят /set_profile и затем выполняют
+случайные команды из заданной смеси.
+
+    python benchmarks/bench_e2e.py [--users 2000] [--actions 5] [--concurrency 200]
+        [--mix log_water=40,log_food=25,log_workout=15,check_progress=10,set_profile=10]
+        [--api-latency-ms 50] [--api-error-rate 0.02] [--output result.json]
+
+Результат — JSON с пропускной способностью, p50/p95/p99 по каждой команде и пиковым
+RSS; для сравнения между коммитами в него записывается текущий commit.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database
+from config import config
+from bootstrap import start_services, stop_services, create_dispatcher
+from services import chart
+from fake_telegram import FakeTelegramAPI, start_server, make_bot, message_update
+from fake_services import FakeOpenFoodFacts, FakeOpenWeather
+
+DEFAULT_MIX = "log_water=40,log_food=25,log_workout=15,check_progress=10,set_profile=10"
+CITIES = ["Москва", "Казань", "Сочи", "Новосибирск", "Мурманск", "Самара", "Владивосток"]
+FOODS = ["банан", "яблоко", "гречка", "овсянка", "творог", "курица", "рис", "кефир", "хлеб", "омлет"]
+WORKOUTS = ["бег", "ходьба", "велосипед", "плавание", "силовая", "йога", "кардио", "танцы"]
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def peak_rss_mb(pid) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def profile_steps(rng: random.Random) -> list:
+    return [
+        "/set_profile",
+        str(rng.randint(50, 110)),
+        str(rng.randint(150, 200)),
+        str(rng.randint(18, 70)),
+        rng.choice(["мужчина", "женщина"]),
+        str(rng.choice([0, 15, 30, 60, 90])),
+        rng.choice(CITIES),
+        rng.choice(["похудеть", "поддерживать", "набрать"]),
+        "да"
+    ]
+
+def command_steps(command: str, rng: random.Random) -> list:
+    if command == "set_profile":
+        return profile_steps(rng)
+    if command == "log_water":
+        return [f"/log_water {rng.choice([150, 200, 250, 330, 500])}"]
+    if command == "log_food":
+        return [f"/log_food {rng.choice(FOODS)}", str(rng.choice([50, 100, 150, 200, 300]))]
+    if command == "log_workout":
+        return [f"/log_workout {rng.choice(WORKOUTS)} {rng.choice([15, 20, 30, 45, 60])}"]
+    return [f"/{command}"]
+
+class LoadRun:
+    def __init__(self, dp, bot, args):
+        self.dp = dp
+        self.bot = bot
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        self.latencies = {command: [] for command in self.mix}
+        self.errors = {command: 0 for command in self.mix}
+        self._update_ids = itertools.count(1)
+        self._slots = asyncio.Semaphore(args.concurrency)
+
+    async def run_command(self, user_id: int, command: str, rng: random.Random):
+        elapsed = 0.0
+        for text in command_steps(command, rng):
+            update = message_update(next(self._update_ids), user_id, text)
+            start = time.perf_counter()
+            try:
+                await self.dp.feed_raw_update(self.bot, update)
+            except Exception:
+                self.errors[command] += 1
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+        self.latencies[command].append(elapsed)
+
+    async def virtual_user(self, user_id: int):
+        rng = random.Random(self.args.seed * 1000003 + user_id)
+        commands = list(self.mix)
+        weights = list(self.mix.values())
+        async with self._slots:
+            if "set_profile" in self.mix:
+                await self.run_command(user_id, "set_profile", rng)
+            for _ in range(self.args.actions):
+                if self.args.think_ms:
+                    await asyncio.sleep(rng.uniform(0, 2 * self.args.think_ms) / 1000)
+                await self.run_command(user_id, rng.choices(commands, weights)[0], rng)
+
+    async def run(self) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*[self.virtual_user(100000 + index) for index in range(self.args.users)])
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> dict:
+        commands = {}
+        for command, latencies in self.latencies.items():
+            latencies.sort()
+            commands[command] = {
+                'count': len(latencies),
+                'errors': self.errors[command],
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000
+            }
+        total = sum(entry['count'] for entry in commands.values())
+        return {
+            'commands_total': total,
+            'updates_total': next(self._update_ids) - 1,
+            'elapsed_sec': elapsed,
+            'commands_per_sec': total / elapsed if elapsed else 0.0,
+            'commands': commands
+        }
+
+async def main(args):
+    telegram = FakeTelegramAPI()
+    food_api = FakeOpenFoodFacts(args.api_latency_ms / 1000, args.api_jitter_ms / 1000, args.api_error_rate, args.seed)
+    weather_api = FakeOpenWeather(args.api_latency_ms / 1000, args.api_jitter_ms / 1000, args.api_error_rate, args.seed)
+    telegram_runner, telegram_url = await start_server(telegram.app())
+    food_runner, food_url = await start_server(food_api.app())
+    weather_runner, weather_url = await start_server(weather_api.app())
+    config.OPENFOODFACTS_URL = food_url + "/cgi/search.pl"
+    config.OPENWEATHER_URL = weather_url + "/data/2.5/weather"
+    config.WEATHER_API_KEY = "bench"
+    config.THROTTLE_ENABLED = args.throttle
+
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            await database.init_db()
+            storage = await start_services()
+            bot = make_bot(telegram_url)
+            dp = create_dispatcher(storage)
+            run = LoadRun(dp, bot, args)
+            try:
+                elapsed = await run.run()
+                chart_pids = list(getattr(chart._executor, '_processes', None) or {})
+                chart_rss = max((peak_rss_mb(pid) for pid in chart_pids), default=0.0)
+            finally:
+                await bot.session.close()
+                await stop_services(storage)
+        finally:
+            os.chdir(workdir)
+            for runner in (telegram_runner, food_runner, weather_runner):
+                await runner.cleanup()
+
+    result = {
+        'commit': git_commit(),
+        'params': {
+            'users': args.users,
+            'actions': args.actions,
+            'concurrency': args.concurrency,
+            'mix': run.mix,
+            'api_latency_ms': args.api_latency_ms,
+            'api_error_rate': args.api_error_rate,
+            'think_ms': args.think_ms,
+            'throttle': args.throttle,
+            'seed': args.seed
+        },
+        **run.report(elapsed),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'chart_worker_peak_rss_mb': chart_rss,
+        'telegram_calls': telegram.calls,
+        'openfoodfacts': food_api.stats(),
+        'openweather': weather_api.stats()
+    }
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--actions", type=int, default=5, help="команд на пользователя после настройки профиля")
+    parser.add_argument("--concurrency", type=int, default=200, help="одновременно активных пользователей")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--think-ms", type=float, default=0, help="средняя пауза между командами")
+    parser.add_argument("--api-latency-ms", type=float, default=50)
+    parser.add_argument("--api-jitter-ms", type=float, default=20)
+    parser.add_argument("--api-error-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--throttle", action="store_true", help="включить ограничение частоты (по умолчанию выключено)")
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
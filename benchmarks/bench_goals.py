@@ -0,0 +1,123 @@
+"""
+Пересчет целей для миллиона пользователей: скалярные функции из
+services/calculations.py против векторных *_batch (с проверкой, что результаты
+совпадают поэлементно) и полный цикл recompute_water_goals по базе. Результат в JSON.
+
+    python benchmarks/bench_goals.py [пользователей]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from config import config
+from services.calculations import (
+    calculate_bmr, calculate_calorie_goal, calculate_water_goal,
+    calculate_bmr_batch, calculate_calorie_goal_batch, calculate_water_goal_batch
+)
+from services.goals import recompute_water_goals
+
+def synthetic_users(count: int) -> dict:
+    rng = np.random.default_rng(1)
+    return {
+        # шаг 0.1 кг и 0.5 см дает много значений ровно на .5 — проверка банковского округления
+        'weight': np.round(rng.uniform(40, 150, count), 1),
+        'height': np.round(rng.uniform(140, 210, count) * 2) / 2,
+        'age': rng.integers(14, 90, count),
+        'gender': rng.choice(np.array(['мужчина', 'женщина', 'Мужчина']), count),
+        'activity': rng.choice(np.array([0, 15, 29, 30, 45, 60, 90, 120]), count),
+        'temperature': np.round(rng.uniform(-20, 40, count), 1),
+        'goal': rng.choice(np.array(['похудеть', 'поддерживать', 'набрать']), count)
+    }
+
+def compute_scalar(users: dict) -> tuple:
+    weight, height, age = users['weight'].tolist(), users['height'].tolist(), users['age'].tolist()
+    gender, activity = users['gender'].tolist(), users['activity'].tolist()
+    temperature, goal = users['temperature'].tolist(), users['goal'].tolist()
+    calories, water = [], []
+    for i in range(len(weight)):
+        bmr = calculate_bmr(weight[i], height[i], age[i], gender[i])
+        calories.append(calculate_calorie_goal(bmr, activity[i], goal[i]))
+        water.append(calculate_water_goal(weight[i], activity[i], temperature[i]))
+    return calories, water
+
+def compute_batch(users: dict) -> tuple:
+    bmr = calculate_bmr_batch(users['weight'], users['height'], users['age'], users['gender'])
+    calories = calculate_calorie_goal_batch(bmr, users['activity'], users['goal'])
+    water = calculate_water_goal_batch(users['weight'], users['activity'], users['temperature'])
+    return calories, water
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+async def bench_recompute(users: dict) -> dict:
+    count = len(users['weight'])
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        await database.init_db()
+        await database.open_pool(database.DB_PATH)
+        try:
+            water = calculate_water_goal_batch(users['weight'], users['activity'], users['temperature'])
+            async with database.pool.writer() as db:
+                await db.executemany(
+                    "INSERT INTO users (user_id, weight, height, age, gender, activity_minutes, temperature, water_goal) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    zip(range(1, count + 1), users['weight'].tolist(), users['height'].tolist(),
+                        users['age'].tolist(), users['gender'].tolist(), users['activity'].tolist(),
+                        users['temperature'].tolist(), water.tolist())
+                )
+                await db.commit()
+            
+            unchanged_start = time.perf_counter()
+            unchanged = await recompute_water_goals()
+            unchanged_elapsed = time.perf_counter() - unchanged_start
+            
+            config.WATER_PER_KG += 5
+            start = time.perf_counter()
+            updated = await recompute_water_goals()
+            elapsed = time.perf_counter() - start
+            
+            async with database.pool.reader() as db:
+                cursor = await db.execute(
+                    "SELECT weight, activity_minutes, temperature, water_goal FROM users WHERE user_id % 997 = 0"
+                )
+                sample = await cursor.fetchall()
+            mismatches = sum(
+                calculate_water_goal(row[0], row[1], row[2]) != row[3] for row in sample
+            )
+        finally:
+            config.WATER_PER_KG -= 5
+            await database.close_pool()
+    return {
+        'noop_recompute_sec': unchanged_elapsed,
+        'noop_updated': unchanged,
+        'recompute_sec': elapsed,
+        'updated': updated,
+        'sampled_mismatches': mismatches
+    }
+
+def main(count: int):
+    users = synthetic_users(count)
+    (scalar_calories, scalar_water), scalar_elapsed = timed(compute_scalar, users)
+    (batch_calories, batch_water), batch_elapsed = timed(compute_batch, users)
+    print(json.dumps({
+        'users': count,
+        'scalar_sec': scalar_elapsed,
+        'batch_sec': batch_elapsed,
+        'speedup': scalar_elapsed / batch_elapsed,
+        'calorie_mismatches': int(np.count_nonzero(np.asarray(scalar_calories) != batch_calories)),
+        'water_mismatches': int(np.count_nonzero(np.asarray(scalar_water) != batch_water)),
+        **asyncio.run(bench_recompute(users))
+    }, indent=2))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
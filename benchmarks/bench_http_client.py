@@ -0,0 +1,63 @@
+"""
+Задержка запросов к локальному серверу-заглушке: новая ClientSession
+на каждый вызов против общей сессии с пулом соединений.
+
+    python benchmarks/bench_http_client.py [запросов]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import http_client
+
+async def handle(request: web.Request) -> web.Response:
+    return web.json_response({'products': [{'product_name': 'банан', 'nutriments': {'energy-kcal_100g': 89}}]})
+
+async def start_stub() -> tuple:
+    app = web.Application()
+    app.router.add_get('/search', handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/search"
+
+async def per_call(url: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            await response.json()
+
+async def shared(url: str):
+    async with http_client.http_client() as session:
+        async with session.get(url) as response:
+            await response.json()
+
+async def measure(label: str, request, url: str, count: int):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await request(url)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"{label:<9} mean {sum(latencies) / count * 1000:6.3f} ms | "
+          f"p99 {latencies[int(count * 0.99) - 1] * 1000:6.3f} ms")
+
+async def main(count: int):
+    runner, url = await start_stub()
+    try:
+        await measure("per-call", per_call, url, count)
+        await http_client.open_http_session()
+        await measure("shared", shared, url, count)
+    finally:
+        await http_client.close_http_session()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
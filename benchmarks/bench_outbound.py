@@ -0,0 +1,86 @@
+"""
+Исходящие сообщения против заглушки Bot API с лимитами Telegram (30/с на бота,
+3/с на чат, сверх — 429). Рассылка по многим чатам идет одновременно с ответами
+пользователям; сравниваются отправка напрямую с повтором после retry_after
+и отправка через OutboundLimiter. Результат в JSON.
+
+    python benchmarks/bench_outbound.py [чатов в рассылке] [пользователей] [ответов на пользователя]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.exceptions import TelegramRetryAfter
+from services.outbound import OutboundLimiter, OutboundMiddleware, broadcast
+from fake_telegram import RateLimitedTelegramAPI, start_server, make_bot
+
+class NaiveRetry:
+    """
+    Поведение без очереди: отправить сразу, при 429 подождать retry_after и повторить
+    """
+    async def __call__(self, make_request, bot, method):
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+
+def percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+async def run(mode: str, chats: int, users: int, replies: int) -> dict:
+    api = RateLimitedTelegramAPI()
+    runner, url = await start_server(api.app())
+    bot = make_bot(url)
+    limiter = OutboundLimiter(global_rate=25, global_burst=5, chat_rate=1, chat_burst=2, queue_size=200)
+    bot.session.middleware(OutboundMiddleware(limiter, max_retries=10) if mode == "limiter" else NaiveRetry())
+    
+    latencies = []
+    
+    async def user(chat_id: int):
+        rng = random.Random(chat_id)
+        for _ in range(replies):
+            await asyncio.sleep(rng.uniform(0.5, 1.5))
+            start = time.perf_counter()
+            await bot.send_message(chat_id, "ответ")
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    broadcast_task = asyncio.create_task(broadcast(bot, range(1000000, 1000000 + chats), "рассылка", concurrency=200))
+    await asyncio.gather(*[user(chat_id) for chat_id in range(1, users + 1)])
+    interactive_done = time.perf_counter() - start
+    stats = await broadcast_task
+    elapsed = time.perf_counter() - start
+    
+    await limiter.close()
+    await bot.session.close()
+    await runner.cleanup()
+    latencies.sort()
+    return {
+        'elapsed_sec': elapsed,
+        'interactive_done_sec': interactive_done,
+        'broadcast_sent': stats['sent'],
+        'broadcast_failed': stats['failed'],
+        'delivered_per_sec': sum(api.calls.values()) / elapsed,
+        'responses_429': api.rejected,
+        'reply_p50_ms': percentile(latencies, 0.50) * 1000,
+        'reply_p95_ms': percentile(latencies, 0.95) * 1000,
+        'reply_p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+async def main(chats: int, users: int, replies: int):
+    result = {'chats': chats, 'users': users, 'replies_per_user': replies}
+    for mode in ("direct", "limiter"):
+        result[mode] = await run(mode, chats, users, replies)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    replies = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    asyncio.run(main(chats, users, replies))
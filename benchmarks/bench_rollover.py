@@ -0,0 +1,71 @@
+"""
+Задержка log_water в момент смены дня на большой таблице пользователей:
+глобальный UPDATE в полночь против ленивого сброса счетчиков.
+
+    python benchmarks/bench_rollover.py [пользователей] [записей]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+async def populate(users: int):
+    async with database.pool.writer() as db:
+        await db.executemany(
+            "INSERT INTO users (user_id, weight, water_goal, logged_water, counters_day) VALUES (?, 70, 2500, 1000, ?)",
+            [(user_id, database.user_day()) for user_id in range(users)]
+        )
+        await db.commit()
+
+async def measure(users: int, writes: int, midnight) -> list:
+    latencies = []
+    
+    async def writer():
+        for _ in range(writes):
+            start = time.perf_counter()
+            await database.log_water(random.randrange(users), 250)
+            latencies.append(time.perf_counter() - start)
+    
+    task = asyncio.create_task(writer())
+    await asyncio.sleep(0.05)
+    await midnight()
+    await task
+    return sorted(latencies)
+
+async def global_sweep():
+    async with database.pool.writer() as db:
+        await db.execute("UPDATE users SET logged_water = 0, logged_calories = 0, burned_calories = 0")
+        await db.commit()
+    database.user_cache.clear()
+
+async def lazy_rollover():
+    database.user_day = lambda utc_offset=None: "2100-01-01"
+
+def report(label: str, latencies: list):
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<8} p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms | "
+          f"p99 {p99 * 1000:7.2f} ms | max {latencies[-1] * 1000:7.2f} ms")
+
+async def main(users: int, writes: int):
+    for label, midnight in (("sweep", global_sweep), ("lazy", lazy_rollover)):
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_PATH = os.path.join(tmp, "bench.db")
+            database.user_cache.clear()
+            await database.init_db()
+            await database.open_pool(database.DB_PATH)
+            try:
+                await populate(users)
+                report(label, await measure(users, writes, midnight))
+            finally:
+                await database.close_pool()
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    asyncio.run(main(users, writes))
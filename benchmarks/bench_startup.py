@@ -0,0 +1,59 @@
+"""
+Время импорта main.py и RSS процесса на холодном старте. Каждый замер
+делается в отдельном интерпретаторе, результат печатается в JSON.
+
+    python benchmarks/bench_startup.py [--runs 5] [--max-import-ms N] [--max-rss-mb N]
+
+С порогами скрипт завершается с кодом 1, если медиана их превышает.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'import_ms': elapsed * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': sorted(m for m in ('matplotlib', 'numpy') if m in sys.modules)
+}))
+"""
+
+def probe() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-rss-mb", type=float)
+    args = parser.parse_args()
+    
+    samples = [probe() for _ in range(args.runs)]
+    result = {
+        'runs': args.runs,
+        'import_ms_median': statistics.median(s['import_ms'] for s in samples),
+        'rss_mb_median': statistics.median(s['rss_mb'] for s in samples),
+        'heavy_modules': samples[-1]['heavy_modules']
+    }
+    print(json.dumps(result, indent=2))
+    
+    failed = (
+        (args.max_import_ms is not None and result['import_ms_median'] > args.max_import_ms)
+        or (args.max_rss_mb is not None and result['rss_mb_median'] > args.max_rss_mb)
+    )
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
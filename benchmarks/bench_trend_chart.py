@@ -0,0 +1,47 @@
+"""
+Отрисовка графиков-трендов для рядов разной длины: время рендера и размер PNG
+должны оставаться постоянными благодаря прореживанию (LTTB) и переиспользованию
+шаблона фигуры. Результат в JSON.
+
+    python benchmarks/bench_trend_chart.py [повторов]
+"""
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.chart import render_trend_chart
+
+SIZES = (100, 1000, 10000, 100000)
+
+def synthetic_series(points: int) -> list:
+    start = time.time() - points * 3600
+    xs = [start + i * 3600 for i in range(points)]
+    intake = [2000 + 300 * math.sin(i / 24) + random.uniform(-200, 200) for i in range(points)]
+    burned = [300 + random.uniform(0, 400) for _ in range(points)]
+    return [[xs, intake], [xs, burned]]
+
+def main(repeats: int):
+    render_trend_chart('calories', synthetic_series(10), 2000)
+    results = []
+    for size in SIZES:
+        series = synthetic_series(size)
+        timings, png = [], b''
+        for _ in range(repeats):
+            start = time.perf_counter()
+            png = render_trend_chart('calories', series, 2000)
+            timings.append(time.perf_counter() - start)
+        results.append({
+            'points': size,
+            'render_ms_median': statistics.median(timings) * 1000,
+            'png_bytes': len(png)
+        })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
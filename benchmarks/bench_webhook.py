@@ -0,0 +1,81 @@
+"""
+Нагрузочный тест вебхука: синтетические апдейты POST-запросами на локальный
+вебхук, ответы бота уходят в заглушку Telegram API. Печатает updates/sec
+и p50/p99 задержки в JSON.
+
+    python benchmarks/bench_webhook.py [апдейтов] [параллельных клиентов]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiogram import Dispatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from config import config
+from webhook import create_webhook_app
+from handlers.profile import router as profile_router
+from handlers.tracking import router as tracking_router
+from handlers.progress import router as progress_router
+from fake_telegram import FakeTelegramAPI, start_server, make_bot, message_update
+
+COMMANDS = ["/help", "/log_water 250", "/profile", "/start"]
+
+async def main(total: int, concurrency: int):
+    config.WEBHOOK_SECRET = "bench-secret"
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        await database.init_db()
+        await database.open_pool(database.DB_PATH)
+        
+        telegram_runner, telegram_url = await start_server(FakeTelegramAPI().app())
+        bot = make_bot(telegram_url)
+        dp = Dispatcher()
+        dp.include_router(profile_router)
+        dp.include_router(tracking_router)
+        dp.include_router(progress_router)
+        webhook_runner, webhook_url = await start_server(create_webhook_app(dp, bot))
+        url = webhook_url + config.WEBHOOK_PATH
+        
+        latencies = []
+        update_ids = iter(range(1, total + 1))
+        
+        async def client(session: aiohttp.ClientSession):
+            for update_id in update_ids:
+                update = message_update(update_id, random.randint(1, 1000), random.choice(COMMANDS))
+                start = time.perf_counter()
+                async with session.post(url, json=update, headers={'X-Telegram-Bot-Api-Secret-Token': config.WEBHOOK_SECRET}) as response:
+                    await response.read()
+                    assert response.status == 200, response.status
+                latencies.append(time.perf_counter() - start)
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                start = time.perf_counter()
+                await asyncio.gather(*[client(session) for _ in range(concurrency)])
+                elapsed = time.perf_counter() - start
+        finally:
+            await webhook_runner.cleanup()
+            await telegram_runner.cleanup()
+            await database.close_pool()
+        
+        latencies.sort()
+        print(json.dumps({
+            'updates': total,
+            'concurrency': concurrency,
+            'updates_per_sec': total / elapsed,
+            'p50_ms': latencies[len(latencies) // 2] * 1000,
+            'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000
+        }, indent=2))
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(total, concurrency))
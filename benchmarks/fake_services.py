@@ -0,0 +1,60 @@
+"""
+Заглушки OpenFoodFacts и OpenWeather для бенчмарков: отвечают с заданной
+задержкой и долей ошибок 500, ответы по формату совпадают с настоящими API.
+"""
+import asyncio
+import random
+import zlib
+
+from aiohttp import web
+
+class FakeExternalAPI:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+
+    def payload(self, request: web.Request) -> dict:
+        raise NotImplementedError
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({'error': 'stub failure'}, status=500)
+        return web.json_response(self.payload(request))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self.handle)
+        return app
+
+    def stats(self) -> dict:
+        return {'requests': self.requests, 'errors': self.errors}
+
+class FakeOpenFoodFacts(FakeExternalAPI):
+    def payload(self, request: web.Request) -> dict:
+        name = request.query.get('search_terms', '')
+        calories = 20 + zlib.crc32(name.encode()) % 500
+        return {'count': 1, 'products': [{
+            'product_name': name,
+            'brands': 'Stub',
+            'nutriments': {'energy-kcal_100g': calories}
+        }]}
+
+class FakeOpenWeather(FakeExternalAPI):
+    def payload(self, request: web.Request) -> dict:
+        city = request.query.get('q', '')
+        temperature = zlib.crc32(city.encode()) % 40 - 5
+        return {
+            'name': city,
+            'main': {'temp': temperature},
+            'weather': [{'description': 'ясно'}],
+            'timezone': 3 * 3600
+        }
@@ -0,0 +1,117 @@
+"""
+Локальная заглушка Telegram Bot API для бенчмарков: принимает вызовы
+методов бота и отвечает правдоподобными объектами без обращения в сеть.
+"""
+import itertools
+import time
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+TOKEN = "123456:FAKE-telegram-token-for-benchmarks"
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'HealthyBot', 'username': 'healthy_bot'}
+
+class FakeTelegramAPI:
+    def __init__(self):
+        self.calls = {}
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+
+    def _message(self, form) -> dict:
+        chat_id = int(form.get('chat_id', 0))
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER
+        }
+        if 'text' in form:
+            message['text'] = form['text']
+        if 'photo' in form:
+            file_id = f"photo-{next(self._file_ids)}"
+            message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1000, 'height': 400}]
+            if 'caption' in form:
+                message['caption'] = form['caption']
+        return message
+
+    def result(self, method: str, form) -> object:
+        if method == 'getme':
+            return BOT_USER
+        if method in ('sendmessage', 'sendphoto'):
+            return self._message(form)
+        return True
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method'].lower()
+        self.calls[method] = self.calls.get(method, 0) + 1
+        form = await request.post()
+        return web.json_response({'ok': True, 'result': self.result(method, form)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
+
+class RateLimitedTelegramAPI(FakeTelegramAPI):
+    """
+    Заглушка с лимитами Telegram: не больше global_limit отправок в секунду на бота
+    и chat_limit в секунду на чат, сверх лимита — 429 с retry_after
+    """
+    def __init__(self, global_limit: int = 30, chat_limit: int = 3, retry_after: int = 1):
+        super().__init__()
+        self.global_limit = global_limit
+        self.chat_limit = chat_limit
+        self.retry_after = retry_after
+        self.rejected = 0
+        self._window = None
+        self._global = 0
+        self._chats = {}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method'].lower()
+        if not method.startswith(('send', 'copy', 'forward')):
+            return await super().handle(request)
+        
+        form = await request.post()
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window, self._global, self._chats = window, 0, {}
+        chat_id = form.get('chat_id')
+        self._global += 1
+        self._chats[chat_id] = self._chats.get(chat_id, 0) + 1
+        if self._global > self.global_limit or self._chats[chat_id] > self.chat_limit:
+            self.rejected += 1
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {self.retry_after}",
+                'parameters': {'retry_after': self.retry_after}
+            }, status=429)
+        self.calls[method] = self.calls.get(method, 0) + 1
+        return web.json_response({'ok': True, 'result': self.result(method, form)})
+
+async def start_server(app: web.Application, host: str = '127.0.0.1', port: int = 0) -> tuple:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+def make_bot(base_url: str) -> Bot:
+    return Bot(token=TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+
+def message_update(update_id: int, user_id: int, text: str) -> dict:
+    user = {'id': user_id, 'is_bot': False, 'first_name': f"user{user_id}"}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': user,
+            'text': text
+        }
+    }
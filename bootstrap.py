@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from config import config
+from database import open_pool, close_pool, start_write_behind, stop_write_behind, user_cache
+from services.http_client import open_http_session, close_http_session
+from services.food import food_cache
+from services.weather import weather_cache
+from services.food_catalog import load_catalog_index
+from services.goals import run_weather_refresh
+from services.recommendations import get_planner
+from services.outbound import outbound_limiter, OutboundMiddleware
+from services.chart import start_chart_pool, stop_chart_pool, warm_up_chart_pool, chart_cache, chart_file_ids
+from middleware.logging_middleware import LoggingMiddleware
+from middleware.metrics_middleware import MetricsMiddleware
+from middleware.throttling_middleware import ThrottlingMiddleware
+from metrics import track_cache, monitor_loop_lag, start_metrics_server
+from fsm_storage import SQLiteStorage
+from handlers.profile import router as profile_router
+from handlers.tracking import router as tracking_router
+from handlers.progress import router as progress_router
+
+logger = logging.getLogger(__name__)
+
+_background_tasks = []
+_metrics_runner = None
+
+async def start_services(metrics_port: int = None, scheduled_jobs: bool = True,
+                         shard: tuple = None) -> SQLiteStorage:
+    """
+    Поднимает все долгоживущие ресурсы процесса; схема БД должна быть уже создана init_db().
+    Периодические задачи по всей базе (scheduled_jobs) должны работать в одном процессе.
+    Воркер шарда (index, count) сам обновляет погодные цели своих пользователей:
+    кэш профилей у каждого процесса свой, и чужие записи его бы не сбросили
+    """
+    global _metrics_runner
+    await open_pool()
+    if config.WRITE_BEHIND_ENABLED:
+        start_write_behind()
+    logger.info("База данных инициализирована")
+    
+    catalog_size = await load_catalog_index()
+    logger.info(f"Локальный каталог продуктов: {catalog_size} в памяти")
+    # таблица планировщика меню строится один раз и не на event loop
+    await asyncio.to_thread(get_planner)
+    
+    await open_http_session()
+    start_chart_pool()
+    _background_tasks.append(asyncio.create_task(warm_up_chart_pool()))
+    if (scheduled_jobs or shard is not None) and config.WEATHER_REFRESH_INTERVAL > 0:
+        _background_tasks.append(asyncio.create_task(run_weather_refresh(shard=shard)))
+    
+    storage = SQLiteStorage()
+    storage.start()
+    
+    for name, cache in (('user', user_cache), ('food', food_cache), ('weather', weather_cache),
+                        ('chart', chart_cache), ('chart_file_id', chart_file_ids), ('fsm', storage._cache)):
+        track_cache(name, cache)
+    _background_tasks.append(asyncio.create_task(monitor_loop_lag(config.METRICS_LOOP_LAG_INTERVAL)))
+    metrics_port = config.METRICS_PORT if metrics_port is None else metrics_port
+    if metrics_port:
+        _metrics_runner = await start_metrics_server(config.METRICS_HOST, metrics_port)
+    return storage
+
+async def stop_services(storage: SQLiteStorage):
+    global _metrics_runner
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    if _metrics_runner is not None:
+        await _metrics_runner.cleanup()
+        _metrics_runner = None
+    stop_chart_pool()
+    await outbound_limiter.close()
+    await close_http_session()
+    await storage.close()
+    await stop_write_behind()
+    await close_pool()
+
+def create_bot() -> Bot:
+    """
+    TELEGRAM_API_URL позволяет направить бота на локальный Bot API сервер
+    """
+    if config.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.TELEGRAM_API_URL))
+        bot = Bot(token=config.BOT_TOKEN, session=session)
+    else:
+        bot = Bot(token=config.BOT_TOKEN)
+    if config.OUTBOUND_LIMIT_ENABLED:
+        bot.session.middleware(OutboundMiddleware(outbound_limiter))
+    return bot
+
+def create_dispatcher(storage: SQLiteStorage) -> Dispatcher:
+    dp = Dispatcher(storage=storage)
+    
+    dp.update.middleware(LoggingMiddleware())
+    if config.THROTTLE_ENABLED:
+        dp.message.outer_middleware(ThrottlingMiddleware())
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+    
+    dp.include_router(profile_router)
+    dp.include_router(tracking_router)
+    dp.include_router(progress_router)
+    return dp
@@ -6,9 +6,110 @@ load_dotenv()
 class Config:
     BOT_TOKEN = os.getenv("BOT_TOKEN")
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+    OPENFOODFACTS_URL = os.getenv("OPENFOODFACTS_URL", "https://world.openfoodfacts.org/cgi/search.pl")
+    OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+    
+    BOT_MODE = os.getenv("BOT_MODE", "polling")
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+    WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+    WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", 100))
+    POLLING_TIMEOUT = int(os.getenv("POLLING_TIMEOUT", 30))
+    
+    WORKERS = int(os.getenv("WORKERS", 0))
+    WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", 1000))
+    WORKER_MAX_IN_FLIGHT = int(os.getenv("WORKER_MAX_IN_FLIGHT", 100))
+    WORKER_USER_BACKLOG = int(os.getenv("WORKER_USER_BACKLOG", 20))
+    
+    LOG_FILE = os.getenv("LOG_FILE", "bot.log")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    LOG_ROTATE_INTERVAL = float(os.getenv("LOG_ROTATE_INTERVAL", 24 * 3600))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
     
     WATER_PER_KG = 30
     WATER_PER_30_MIN = 500
     WATER_FOR_HOT_WEATHER = 750
+    HOT_WEATHER_TEMPERATURE = 25
+
+    DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", 4))
+    DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", 64 * 1024 * 1024))
+    DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", -16000))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+
+    WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", 256))
+    WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", 0.005))
+
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 300))
+
+    FOOD_CACHE_SIZE = int(os.getenv("FOOD_CACHE_SIZE", 2000))
+    FOOD_CACHE_TTL = float(os.getenv("FOOD_CACHE_TTL", 7 * 24 * 3600))
+    FOOD_NEGATIVE_CACHE_TTL = float(os.getenv("FOOD_NEGATIVE_CACHE_TTL", 3600))
+
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+    HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", 20))
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+    HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", 15))
+
+    WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", 1000))
+    WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 30 * 60))
+    WEATHER_REFRESH_INTERVAL = float(os.getenv("WEATHER_REFRESH_INTERVAL", 3 * 3600))
+    WEATHER_REFRESH_CONCURRENCY = int(os.getenv("WEATHER_REFRESH_CONCURRENCY", 10))
+
+    FOOD_CATALOG_TOP_N = int(os.getenv("FOOD_CATALOG_TOP_N", 5000))
+    FOOD_CATALOG_CANDIDATES = int(os.getenv("FOOD_CATALOG_CANDIDATES", 20))
+    FOOD_CATALOG_MIN_SIMILARITY = float(os.getenv("FOOD_CATALOG_MIN_SIMILARITY", 0.4))
+
+    THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", "true").lower() == "true"
+    THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", 3))
+    THROTTLE_BURST = float(os.getenv("THROTTLE_BURST", 20))
+    THROTTLE_SWEEP_INTERVAL = float(os.getenv("THROTTLE_SWEEP_INTERVAL", 60))
+    THROTTLE_NOTICE_INTERVAL = float(os.getenv("THROTTLE_NOTICE_INTERVAL", 10))
+    
+    # Лимиты Telegram на исходящие сообщения; глобальный делится между воркерами
+    OUTBOUND_LIMIT_ENABLED = os.getenv("OUTBOUND_LIMIT_ENABLED", "true").lower() == "true"
+    OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", 25))
+    OUTBOUND_GLOBAL_BURST = float(os.getenv("OUTBOUND_GLOBAL_BURST", 5))
+    OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", 1))
+    OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", 2))
+    OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", 20 / 60))
+    OUTBOUND_GROUP_BURST = float(os.getenv("OUTBOUND_GROUP_BURST", 2))
+    OUTBOUND_QUEUE_SIZE = int(os.getenv("OUTBOUND_QUEUE_SIZE", 1000))
+    OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", 3))
+    
+    HISTORY_TIMEOUT = float(os.getenv("HISTORY_TIMEOUT", 2))
+    
+    CHART_WORKERS = int(os.getenv("CHART_WORKERS", 2))
+    CHART_QUEUE_SIZE = int(os.getenv("CHART_QUEUE_SIZE", 32))
+    CHART_TIMEOUT = float(os.getenv("CHART_TIMEOUT", 10))
+    CHART_WARM_UP_DELAY = float(os.getenv("CHART_WARM_UP_DELAY", 0))
+    CHART_CACHE_BYTES = int(os.getenv("CHART_CACHE_BYTES", 32 * 1024 * 1024))
+    CHART_REUSE_FILE_ID = os.getenv("CHART_REUSE_FILE_ID", "true").lower() == "true"
+    CHART_FILE_ID_CACHE_SIZE = int(os.getenv("CHART_FILE_ID_CACHE_SIZE", 50000))
+    CHART_FILE_ID_TTL = float(os.getenv("CHART_FILE_ID_TTL", 24 * 3600))
+    CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", 200))
+    TREND_MAX_DAYS = int(os.getenv("TREND_MAX_DAYS", 3650))
+
+    FSM_TTL = float(os.getenv("FSM_TTL", 24 * 3600))
+    FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", 10000))
+    FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", 1))
+    FSM_SWEEP_INTERVAL = float(os.getenv("FSM_SWEEP_INTERVAL", 600))
+    FSM_COMPRESS_THRESHOLD = int(os.getenv("FSM_COMPRESS_THRESHOLD", 512))
+    
+    # Метрики Prometheus (порт 0 — эндпоинт выключен; воркер N слушает METRICS_PORT + 1 + N)
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+    METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", 0.5))
     
 config = Config()
\ No newline at end of file
@@ -1,11 +1,113 @@
 import aiosqlite
+import asyncio
 import json
-from datetime import datetime
+import logging
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from config import config
+from services.cache import TTLCache
+from services.calculations import calculate_water_goal
+from metrics import db_latency, timed
 
 DB_PATH = "healthy_lifestyle_bot.db"
 
+logger = logging.getLogger(__name__)
+
+user_cache = TTLCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+# user_id -> число незавершенных чтений профиля мимо кэша; записи, попавшие
+# в это окно, помечают чтение устаревшим, и его результат не кэшируется
+_user_reads = {}
+_stale_reads = set()
+
+class ConnectionPool:
+    """
+    Долгоживущие соединения с SQLite: одно на запись и несколько на чтение
+    """
+    def __init__(self, path: str = DB_PATH, readers: int = None):
+        self.path = path
+        self.readers_count = readers or config.DB_READ_POOL_SIZE
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._readers = asyncio.Queue()
+        self._all_readers = []
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        db.row_factory = aiosqlite.Row
+        await apply_pragmas(db)
+        return db
+
+    async def open(self):
+        self._writer = await self._connect()
+        for _ in range(self.readers_count):
+            reader = await self._connect()
+            self._all_readers.append(reader)
+            self._readers.put_nowait(reader)
+
+    async def close(self):
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    @asynccontextmanager
+    async def writer(self):
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+    @asynccontextmanager
+    async def reader(self):
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
+
+pool: ConnectionPool = None
+
+async def apply_pragmas(db: aiosqlite.Connection):
+    await db.execute(f"PRAGMA journal_mode = {config.DB_JOURNAL_MODE}")
+    await db.execute(f"PRAGMA synchronous = {config.DB_SYNCHRONOUS}")
+    await db.execute(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+    await db.execute(f"PRAGMA cache_size = {int(config.DB_CACHE_SIZE)}")
+    await db.execute(f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT_MS)}")
+
+async def open_pool(path: str = DB_PATH, readers: int = None) -> ConnectionPool:
+    global pool
+    pool = ConnectionPool(path, readers)
+    await pool.open()
+    return pool
+
+async def close_pool():
+    global pool
+    if pool is not None:
+        await pool.close()
+        pool = None
+
+@asynccontextmanager
+async def _single_connection():
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        yield db
+
+def _writer():
+    return pool.writer() if pool is not None else _single_connection()
+
+def _reader():
+    return pool.reader() if pool is not None else _single_connection()
+
 async def init_db():
     async with aiosqlite.connect(DB_PATH) as db:
+        await apply_pragmas(db)
         await db.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 user_id INTEGER PRIMARY KEY,
@@ -20,6 +122,9 @@ async def init_db():
                 logged_water REAL DEFAULT 0,
                 logged_calories REAL DEFAULT 0,
                 burned_calories REAL DEFAULT 0,
+                counters_day TEXT,
+                utc_offset INTEGER,
+                temperature REAL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
@@ -60,16 +165,183 @@ async def init_db():
         """)
         
         await db.commit()
+        await migrate(db)
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, declaration: str) -> bool:
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    if column in {row[1] for row in await cursor.fetchall()}:
+        return False
+    await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return True
+
+async def _migrate_counters_day(db: aiosqlite.Connection):
+    if await _add_column(db, 'users', 'counters_day', 'TEXT'):
+        await db.execute("UPDATE users SET counters_day = date('now', 'localtime')")
+    await _add_column(db, 'users', 'utc_offset', 'INTEGER')
+
+async def _migrate_log_indexes(db: aiosqlite.Connection):
+    for table in ('water_logs', 'food_logs', 'workout_logs'):
+        await db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_time ON {table} (user_id, timestamp)")
+
+async def _migrate_daily_summary(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            user_id INTEGER,
+            day TEXT,
+            water REAL DEFAULT 0,
+            calories_in REAL DEFAULT 0,
+            calories_out REAL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        INSERT OR IGNORE INTO daily_summary (user_id, day, water, calories_in, calories_out)
+        SELECT user_id, day, SUM(water), SUM(calories_in), SUM(calories_out) FROM (
+            SELECT user_id, date(timestamp, 'localtime') AS day, amount AS water,
+                   0 AS calories_in, 0 AS calories_out FROM water_logs
+            UNION ALL
+            SELECT user_id, date(timestamp, 'localtime'), 0, calories, 0 FROM food_logs
+            UNION ALL
+            SELECT user_id, date(timestamp, 'localtime'), 0, 0, burned_calories FROM workout_logs
+        )
+        GROUP BY user_id, day
+    """)
+
+async def _migrate_food_cache(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS food_cache (
+            query TEXT PRIMARY KEY,
+            payload TEXT,
+            expires_at REAL
+        ) WITHOUT ROWID
+    """)
+
+async def _migrate_food_catalog(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS food_catalog (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            stem TEXT,
+            calories REAL,
+            brand TEXT,
+            popularity INTEGER DEFAULT 0
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_food_catalog_stem ON food_catalog (stem)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_food_catalog_popularity ON food_catalog (popularity)")
+    try:
+        await db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS food_catalog_fts USING fts5(stem, tokenize = 'trigram')")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 trigram недоступен, поиск по каталогу только по префиксу: {e}")
+
+async def _migrate_fsm_state(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS fsm_state (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data BLOB,
+            updated_at REAL
+        ) WITHOUT ROWID
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_fsm_state_updated ON fsm_state (updated_at)")
+
+async def _migrate_user_temperature(db: aiosqlite.Connection):
+    await _add_column(db, 'users', 'temperature', 'REAL')
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_users_city ON users (city)")
+
+async def _migrate_weight_logs(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS weight_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            weight REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_weight_logs_user_time ON weight_logs (user_id, timestamp)")
+    await db.execute("""
+        INSERT INTO weight_logs (user_id, weight, timestamp)
+        SELECT user_id, weight, COALESCE(updated_at, CURRENT_TIMESTAMP) FROM users WHERE weight IS NOT NULL
+    """)
+
+MIGRATIONS = [
+    _migrate_counters_day,
+    _migrate_log_indexes,
+    _migrate_daily_summary,
+    _migrate_food_cache,
+    _migrate_food_catalog,
+    _migrate_fsm_state,
+    _migrate_user_temperature,
+    _migrate_weight_logs
+]
+
+async def migrate(db: aiosqlite.Connection):
+    """
+    Применяет недостающие миграции, номер версии хранится в PRAGMA user_version
+    """
+    cursor = await db.execute("PRAGMA user_version")
+    version = (await cursor.fetchone())[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        await migration(db)
+        await db.execute(f"PRAGMA user_version = {number}")
+        await db.commit()
+
+COUNTER_COLUMNS = ('logged_water', 'logged_calories', 'burned_calories')
+
+def user_day(utc_offset: int = None) -> str:
+    """
+    Текущий день пользователя: по его смещению от UTC или по времени сервера
+    """
+    if utc_offset is None:
+        return date.today().isoformat()
+    return (datetime.now(timezone.utc) + timedelta(seconds=utc_offset)).date().isoformat()
 
+def _roll_over(user: dict, day: str = None):
+    day = day or user_day(user.get('utc_offset'))
+    if user.get('counters_day') != day:
+        for column in COUNTER_COLUMNS:
+            user[column] = 0
+        user['counters_day'] = day
+
+def _user_written(user_id: int):
+    """
+    Вызывается после каждой записи в users: чтения этого пользователя, начатые
+    до нее, не должны попасть в кэш
+    """
+    if user_id in _user_reads:
+        _stale_reads.add(user_id)
+
+@timed(db_latency)
 async def get_user(user_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-        user = await cursor.fetchone()
-        return dict(user) if user else None
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        _roll_over(cached)
+        return dict(cached)
+    
+    _user_reads[user_id] = _user_reads.get(user_id, 0) + 1
+    try:
+        async with _reader() as db:
+            cursor = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            user = await cursor.fetchone()
+    finally:
+        stale = user_id in _stale_reads
+        _user_reads[user_id] -= 1
+        if not _user_reads[user_id]:
+            del _user_reads[user_id]
+            _stale_reads.discard(user_id)
+    
+    if not user:
+        return None
+    user = dict(user)
+    _roll_over(user)
+    if not stale and not (write_behind is not None and write_behind.pending(user_id)):
+        user_cache.set(user_id, user)
+    return dict(user)
 
+@timed(db_latency)
 async def create_or_update_user(user_data: dict):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _writer() as db:
         user_id = user_data['user_id']
         
         cursor = await db.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
@@ -92,51 +364,478 @@ async def create_or_update_user(user_data: dict):
             query = f"INSERT INTO users ({columns}) VALUES ({placeholders})"
             await db.execute(query, list(user_data.values()))
         
+        if user_data.get('weight') is not None:
+            await db.execute(
+                "INSERT INTO weight_logs (user_id, weight) VALUES (?, ?)",
+                (user_id, user_data['weight'])
+            )
+        
         await db.commit()
+    
+    _user_written(user_id)
+    cached = user_cache.peek(user_id)
+    if cached is not None:
+        cached.update(user_data)
 
-async def log_water(user_id: int, amount: float):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO water_logs (user_id, amount) VALUES (?, ?)",
-            (user_id, amount)
+LOG_COUNTERS = {
+    'water': 'logged_water',
+    'food': 'logged_calories',
+    'workout': 'burned_calories'
+}
+
+def _counters_update_sql(column: str) -> str:
+    assignments = [
+        f"{counter} = CASE WHEN counters_day IS :day THEN {counter} ELSE 0 END"
+        + (" + :amount" if counter == column else "")
+        for counter in COUNTER_COLUMNS
+    ]
+    return f"UPDATE users SET {', '.join(assignments)}, counters_day = :day WHERE user_id = :user_id"
+
+def _summary_upsert_sql(column: str) -> str:
+    return (
+        f"INSERT INTO daily_summary (user_id, day, {column}) VALUES (:user_id, :day, :amount) "
+        f"ON CONFLICT (user_id, day) DO UPDATE SET {column} = {column} + excluded.{column}"
+    )
+
+LOG_STATEMENTS = {
+    'water': (
+        "INSERT INTO water_logs (user_id, amount) VALUES (?, ?)",
+        _counters_update_sql('logged_water'),
+        _summary_upsert_sql('water')
+    ),
+    'food': (
+        "INSERT INTO food_logs (user_id, food_name, calories, grams) VALUES (?, ?, ?, ?)",
+        _counters_update_sql('logged_calories'),
+        _summary_upsert_sql('calories_in')
+    ),
+    'workout': (
+        "INSERT INTO workout_logs (user_id, workout_type, duration_minutes, burned_calories) VALUES (?, ?, ?, ?)",
+        _counters_update_sql('burned_calories'),
+        _summary_upsert_sql('calories_out')
+    )
+}
+
+def _apply_to_cache(kind: str, update_params: dict):
+    _user_written(update_params['user_id'])
+    cached = user_cache.peek(update_params['user_id'])
+    if cached is not None:
+        _roll_over(cached, update_params['day'])
+        column = LOG_COUNTERS[kind]
+        cached[column] = float(cached[column] or 0) + update_params['amount']
+
+async def _write_log(kind: str, user_id: int, insert_params: tuple, amount: float, durable: bool = True):
+    user = await get_user(user_id)
+    update_params = {
+        'amount': amount,
+        'user_id': user_id,
+        'day': user_day(user['utc_offset'] if user else None)
+    }
+    
+    if write_behind is not None:
+        future = write_behind.submit(kind, insert_params, update_params)
+        _apply_to_cache(kind, update_params)
+        if durable:
+            await future
+        else:
+            future.add_done_callback(_log_write_error)
+        return
+    
+    insert_sql, update_sql, summary_sql = LOG_STATEMENTS[kind]
+    async with _writer() as db:
+        await db.execute(insert_sql, insert_params)
+        await db.execute(update_sql, update_params)
+        await db.execute(summary_sql, update_params)
+        await db.commit()
+    _apply_to_cache(kind, update_params)
+
+@timed(db_latency)
+async def log_water(user_id: int, amount: float, durable: bool = True):
+    await _write_log('water', user_id, (user_id, amount), amount, durable)
+
+@timed(db_latency)
+async def log_food(user_id: int, food_name: str, calories: float, grams: float, durable: bool = True):
+    await _write_log('food', user_id, (user_id, food_name, calories, grams), calories, durable)
+
+@timed(db_latency)
+async def log_workout(user_id: int, workout_type: str, duration: int, burned_calories: float, durable: bool = True):
+    await _write_log(
+        'workout',
+        user_id,
+        (user_id, workout_type, duration, burned_calories),
+        burned_calories,
+        durable
+    )
+
+@timed(db_latency)
+async def get_daily_summary(user_id: int, days: int = 7, utc_offset: int = None) -> list:
+    """
+    Итоги по дням за последние days дней пользователя из daily_summary: чтение
+    диапазона первичного ключа (user_id, day) без обращения к журналам
+    """
+    since = (date.fromisoformat(user_day(utc_offset)) - timedelta(days=days - 1)).isoformat()
+    async with _reader() as db:
+        cursor = await db.execute(
+            "SELECT day, water, calories_in, calories_out FROM daily_summary "
+            "WHERE user_id = ? AND day >= ? ORDER BY day",
+            (user_id, since)
         )
-        
-        await db.execute(
-            "UPDATE users SET logged_water = logged_water + ? WHERE user_id = ?",
-            (amount, user_id)
+        return [dict(row) for row in await cursor.fetchall()]
+
+HISTORY_SQL = """
+    SELECT day, SUM(water) AS water, SUM(calories_in) AS calories_in, SUM(calories_out) AS calories_out
+    FROM (
+        SELECT date(timestamp, :shift) AS day, SUM(amount) AS water, 0 AS calories_in, 0 AS calories_out
+        FROM water_logs WHERE user_id = :user_id AND timestamp >= :since GROUP BY 1
+        UNION ALL
+        SELECT date(timestamp, :shift), 0, SUM(calories), 0
+        FROM food_logs WHERE user_id = :user_id AND timestamp >= :since GROUP BY 1
+        UNION ALL
+        SELECT date(timestamp, :shift), 0, 0, SUM(burned_calories)
+        FROM workout_logs WHERE user_id = :user_id AND timestamp >= :since GROUP BY 1
+    )
+    GROUP BY day ORDER BY day
+"""
+
+async def iter_daily_history(user_id: int, days: int, utc_offset: int = None):
+    """
+    Итоги по дням за последние days дней пользователя прямо из журналов: один
+    сгруппированный запрос по диапазону индекса (user_id, timestamp), строки
+    отдаются по мере чтения
+    """
+    if utc_offset is None:
+        utc_offset = int(datetime.now().astimezone().utcoffset().total_seconds())
+    params = {
+        'user_id': user_id,
+        'shift': f"{utc_offset:+d} seconds",
+        'since': _history_since(days, utc_offset)
+    }
+    async with _reader() as db:
+        try:
+            async with db.execute(HISTORY_SQL, params) as cursor:
+                async for row in cursor:
+                    yield dict(row)
+        except asyncio.CancelledError:
+            await db.interrupt()
+            raise
+
+def _history_since(days: int, utc_offset: int) -> str:
+    first_day = date.fromisoformat(user_day(utc_offset)) - timedelta(days=days - 1)
+    since = datetime.combine(first_day, datetime.min.time()) - timedelta(seconds=utc_offset)
+    return since.strftime('%Y-%m-%d %H:%M:%S')
+
+@timed(db_latency)
+async def get_weight_series(user_id: int, days: int, utc_offset: int = None) -> list:
+    """
+    Замеры веса за последние days дней: пары (unix-время, вес)
+    """
+    if utc_offset is None:
+        utc_offset = int(datetime.now().astimezone().utcoffset().total_seconds())
+    async with _reader() as db:
+        cursor = await db.execute(
+            "SELECT CAST(strftime('%s', timestamp) AS INTEGER), weight FROM weight_logs "
+            "WHERE user_id = ? AND timestamp >= ? ORDER BY timestamp",
+            (user_id, _history_since(days, utc_offset))
         )
-        
+        return [tuple(row) for row in await cursor.fetchall()]
+
+@timed(db_latency)
+async def get_goal_inputs(after_user_id: int, limit: int) -> list:
+    """
+    Пачка профилей для пересчета целей по возрастанию user_id:
+    (user_id, weight, activity_minutes, temperature, water_goal)
+    """
+    async with _reader() as db:
+        cursor = await db.execute(
+            "SELECT user_id, weight, activity_minutes, COALESCE(temperature, 20), water_goal FROM users "
+            "WHERE user_id > ? AND weight IS NOT NULL AND activity_minutes IS NOT NULL "
+            "ORDER BY user_id LIMIT ?",
+            (after_user_id, limit)
+        )
+        return [tuple(row) for row in await cursor.fetchall()]
+
+@timed(db_latency)
+async def update_water_goals(rows: list):
+    """
+    rows — пары (water_goal, user_id), пишутся одним executemany
+    """
+    if not rows:
+        return
+    async with _writer() as db:
+        await db.executemany("UPDATE users SET water_goal = ? WHERE user_id = ?", rows)
         await db.commit()
+    
+    for water_goal, user_id in rows:
+        _user_written(user_id)
+        cached = user_cache.peek(user_id)
+        if cached is not None:
+            cached['water_goal'] = water_goal
 
-async def log_food(user_id: int, food_name: str, calories: float, grams: float):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO food_logs (user_id, food_name, calories, grams) VALUES (?, ?, ?, ?)",
-            (user_id, food_name, calories, grams)
+def _shard_filter(shard: tuple = None) -> tuple:
+    """
+    Условие на пользователей одного шарда (index, count) — того же, в который
+    воркеры направляют их апдейты по user_id
+    """
+    if shard is None:
+        return "", ()
+    index, count = shard
+    return " AND user_id % ? = ?", (count, index)
+
+@timed(db_latency)
+async def get_user_cities(shard: tuple = None) -> list:
+    condition, params = _shard_filter(shard)
+    async with _reader() as db:
+        cursor = await db.execute(f"SELECT DISTINCT city FROM users WHERE city IS NOT NULL{condition}", params)
+        return [row[0] for row in await cursor.fetchall()]
+
+@timed(db_latency)
+async def update_city_temperature(city: str, temperature: float, shard: tuple = None) -> int:
+    """
+    Переносит новую температуру города на тех жителей, у кого сменился статус
+    жаркой погоды или температура еще неизвестна, и пересчитывает их water_goal
+    заново по профилю. С shard обновляются только пользователи этого шарда
+    """
+    hot = temperature > config.HOT_WEATHER_TEMPERATURE
+    condition, params = _shard_filter(shard)
+    async with _writer() as db:
+        cursor = await db.execute(
+            "UPDATE users SET temperature = ? "
+            "WHERE city = ? AND water_goal IS NOT NULL AND weight IS NOT NULL AND activity_minutes IS NOT NULL "
+            f"AND (temperature IS NULL OR (temperature > ?) != ?){condition} "
+            "RETURNING user_id, weight, activity_minutes",
+            (temperature, city, config.HOT_WEATHER_TEMPERATURE, hot, *params)
         )
-        
+        goals = [
+            (calculate_water_goal(weight, activity_minutes, temperature), user_id)
+            for user_id, weight, activity_minutes in await cursor.fetchall()
+        ]
+        await db.executemany("UPDATE users SET water_goal = ? WHERE user_id = ?", goals)
+        await db.commit()
+    
+    for water_goal, user_id in goals:
+        _user_written(user_id)
+        cached = user_cache.peek(user_id)
+        if cached is not None:
+            cached['water_goal'] = water_goal
+            cached['temperature'] = temperature
+    return len(goals)
+
+@timed(db_latency)
+async def get_cached_food(query: str):
+    async with _reader() as db:
+        cursor = await db.execute(
+            "SELECT payload, expires_at FROM food_cache WHERE query = ? AND expires_at > ?",
+            (query, time.time())
+        )
+        row = await cursor.fetchone()
+    return (json.loads(row['payload']), row['expires_at']) if row else None
+
+@timed(db_latency)
+async def put_cached_food(query: str, payload: dict, ttl: float):
+    async with _writer() as db:
         await db.execute(
-            "UPDATE users SET logged_calories = logged_calories + ? WHERE user_id = ?",
-            (calories, user_id)
+            "INSERT OR REPLACE INTO food_cache (query, payload, expires_at) VALUES (?, ?, ?)",
+            (query, json.dumps(payload, ensure_ascii=False), time.time() + ttl)
         )
-        
         await db.commit()
 
-async def log_workout(user_id: int, workout_type: str, duration: int, burned_calories: float):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO workout_logs (user_id, workout_type, duration_minutes, burned_calories) VALUES (?, ?, ?, ?)",
-            (user_id, workout_type, duration, burned_calories)
+async def _has_table(db: aiosqlite.Connection, name: str) -> bool:
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+    return await cursor.fetchone() is not None
+
+async def clear_food_catalog():
+    async with _writer() as db:
+        await db.execute("DELETE FROM food_catalog")
+        if await _has_table(db, 'food_catalog_fts'):
+            await db.execute("DELETE FROM food_catalog_fts")
+        await db.commit()
+
+@timed(db_latency)
+async def insert_food_catalog(rows: list):
+    """
+    rows: кортежи (name, stem, calories, brand, popularity)
+    """
+    async with _writer() as db:
+        cursor = await db.execute("SELECT COALESCE(MAX(id), 0) FROM food_catalog")
+        next_id = (await cursor.fetchone())[0] + 1
+        rows = [(next_id + i, *row) for i, row in enumerate(rows)]
+        await db.executemany(
+            "INSERT INTO food_catalog (id, name, stem, calories, brand, popularity) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
         )
-        
-        await db.execute(
-            "UPDATE users SET burned_calories = burned_calories + ? WHERE user_id = ?",
-            (burned_calories, user_id)
+        if await _has_table(db, 'food_catalog_fts'):
+            await db.executemany(
+                "INSERT INTO food_catalog_fts (rowid, stem) VALUES (?, ?)",
+                [(row[0], row[2]) for row in rows]
+            )
+        await db.commit()
+
+@timed(db_latency)
+async def get_top_food_catalog(limit: int) -> list:
+    async with _reader() as db:
+        cursor = await db.execute(
+            "SELECT name, stem, calories, brand, popularity FROM food_catalog ORDER BY popularity DESC LIMIT ?",
+            (limit,)
         )
-        
+        return [dict(row) for row in await cursor.fetchall()]
+
+@timed(db_latency)
+async def search_food_catalog(stem: str, trigrams: list, limit: int) -> list:
+    async with _reader() as db:
+        if trigrams and await _has_table(db, 'food_catalog_fts'):
+            query = ' OR '.join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+            cursor = await db.execute(
+                "SELECT c.name, c.stem, c.calories, c.brand, c.popularity "
+                "FROM food_catalog_fts JOIN food_catalog c ON c.id = food_catalog_fts.rowid "
+                "WHERE food_catalog_fts MATCH ? ORDER BY bm25(food_catalog_fts) LIMIT ?",
+                (query, limit)
+            )
+        else:
+            cursor = await db.execute(
+                "SELECT name, stem, calories, brand, popularity FROM food_catalog "
+                "WHERE stem >= ? AND stem < ? ORDER BY popularity DESC LIMIT ?",
+                (stem, stem + '\uffff', limit)
+            )
+        return [dict(row) for row in await cursor.fetchall()]
+
+@timed(db_latency)
+async def load_fsm_state(key: str, fresh_since: float):
+    async with _reader() as db:
+        cursor = await db.execute(
+            "SELECT state, data FROM fsm_state WHERE key = ? AND updated_at >= ?",
+            (key, fresh_since)
+        )
+        row = await cursor.fetchone()
+    return (row['state'], row['data']) if row else None
+
+@timed(db_latency)
+async def save_fsm_states(rows: list, deleted: list):
+    """
+    rows: кортежи (key, state, data, updated_at); deleted: ключи пустых состояний
+    """
+    async with _writer() as db:
+        if rows:
+            await db.executemany(
+                "INSERT OR REPLACE INTO fsm_state (key, state, data, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        if deleted:
+            await db.executemany("DELETE FROM fsm_state WHERE key = ?", [(key,) for key in deleted])
         await db.commit()
 
-async def reset_daily_logs():
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("UPDATE users SET logged_water = 0, logged_calories = 0, burned_calories = 0")
-        await db.commit()
\ No newline at end of file
+@timed(db_latency)
+async def sweep_fsm_states(idle_before: float) -> int:
+    async with _writer() as db:
+        cursor = await db.execute("DELETE FROM fsm_state WHERE updated_at < ?", (idle_before,))
+        await db.commit()
+        return cursor.rowcount
+
+class WriteBehindQueue:
+    """
+    Копит записи трекинга и сбрасывает их пачками: одна транзакция на пачку.
+    Сброс происходит по размеру пачки или по истечении интервала.
+    """
+    def __init__(self, max_batch: int = None, interval: float = None):
+        self.max_batch = max_batch or config.WRITE_BEHIND_MAX_BATCH
+        self.interval = config.WRITE_BEHIND_INTERVAL if interval is None else interval
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._closing = False
+        self._task = None
+        self._pending = {}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def pending(self, user_id: int) -> int:
+        """
+        Число еще не записанных в базу событий пользователя
+        """
+        return self._pending.get(user_id, 0)
+
+    async def stop(self):
+        self._closing = True
+        self._full.set()
+        self._queue.put_nowait(None)
+        await self._task
+
+    def submit(self, kind: str, insert_params: tuple, update_params: dict) -> asyncio.Future:
+        if self._closing:
+            raise RuntimeError("Очередь записи остановлена")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((kind, insert_params, update_params, future))
+        user_id = update_params['user_id']
+        self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        if self._queue.qsize() >= self.max_batch:
+            self._full.set()
+        return future
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if not self._closing and self._queue.qsize() + 1 < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+            
+            batch = [first] if first is not None else []
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            
+            if batch:
+                await self._flush(batch)
+            if self._closing and self._queue.empty():
+                return
+
+    def _done(self, batch: list):
+        for _, _, update_params, _ in batch:
+            user_id = update_params['user_id']
+            self._pending[user_id] -= 1
+            if not self._pending[user_id]:
+                del self._pending[user_id]
+            _user_written(user_id)
+
+    @timed(db_latency, 'write_behind_flush')
+    async def _flush(self, batch: list):
+        try:
+            async with _writer() as db:
+                for kind, (insert_sql, update_sql, summary_sql) in LOG_STATEMENTS.items():
+                    events = [event for event in batch if event[0] == kind]
+                    if events:
+                        await db.executemany(insert_sql, [event[1] for event in events])
+                        await db.executemany(update_sql, [event[2] for event in events])
+                        await db.executemany(summary_sql, [event[2] for event in events])
+                await db.commit()
+        except Exception as e:
+            self._done(batch)
+            for _, _, update_params, future in batch:
+                user_cache.pop(update_params['user_id'])
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        self._done(batch)
+        for *_, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+def _log_write_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Ошибка отложенной записи: {future.exception()}")
+
+write_behind: WriteBehindQueue = None
+
+def start_write_behind(max_batch: int = None, interval: float = None) -> WriteBehindQueue:
+    global write_behind
+    write_behind = WriteBehindQueue(max_batch, interval)
+    write_behind.start()
+    return write_behind
+
+async def stop_write_behind():
+    global write_behind
+    if write_behind is not None:
+        queue, write_behind = write_behind, None
+        await queue.stop()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from config import config
+from database import load_fsm_state, save_fsm_states, sweep_fsm_states
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+def encode_data(data: Dict[str, Any]) -> Optional[bytes]:
+    if not data:
+        return None
+    raw = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+    if len(raw) > config.FSM_COMPRESS_THRESHOLD:
+        return b'z' + zlib.compress(raw)
+    return b'j' + raw
+
+def decode_data(blob: Optional[bytes]) -> Dict[str, Any]:
+    if not blob:
+        return {}
+    raw = zlib.decompress(blob[1:]) if blob[:1] == b'z' else blob[1:]
+    return json.loads(raw)
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище в базе бота. Изменения копятся в памяти и пачкой сбрасываются
+    в SQLite, диалоги без активности дольше ttl удаляются фоновой задачей
+    """
+    def __init__(self, ttl: float = None, cache_size: int = None,
+                 flush_interval: float = None, sweep_interval: float = None):
+        self.ttl = config.FSM_TTL if ttl is None else ttl
+        self.flush_interval = config.FSM_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.sweep_interval = config.FSM_SWEEP_INTERVAL if sweep_interval is None else sweep_interval
+        self._cache = TTLCache(cache_size or config.FSM_CACHE_SIZE, self.ttl)
+        self._dirty = {}
+        self._tasks = []
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return ':'.join(str(part) if part is not None else '' for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+        ))
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._periodic(self.flush_interval, self.flush)),
+            asyncio.create_task(self._periodic(self.sweep_interval, self.sweep))
+        ]
+
+    async def _periodic(self, interval: float, job):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Ошибка FSM-хранилища: {e}")
+
+    async def _entry(self, key: str) -> dict:
+        entry = self._dirty.get(key) or self._cache.get(key)
+        if entry is None:
+            row = await load_fsm_state(key, time.time() - self.ttl)
+            state, data = row if row else (None, None)
+            entry = {'state': state, 'data': decode_data(data), 'updated_at': time.time()}
+            self._cache.set(key, entry)
+        return entry
+
+    def _touch(self, key: str, entry: dict):
+        entry['updated_at'] = time.time()
+        self._dirty[key] = entry
+        self._cache.set(key, entry)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self._key(key)
+        entry = await self._entry(storage_key)
+        entry['state'] = state.state if isinstance(state, State) else state
+        self._touch(storage_key, entry)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._entry(self._key(key)))['state']
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = self._key(key)
+        entry = await self._entry(storage_key)
+        entry['data'] = dict(data)
+        self._touch(storage_key, entry)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict((await self._entry(self._key(key)))['data'])
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        rows, deleted = [], []
+        for key, entry in dirty.items():
+            if entry['state'] is None and not entry['data']:
+                deleted.append(key)
+            else:
+                rows.append((key, entry['state'], encode_data(entry['data']), entry['updated_at']))
+        try:
+            await save_fsm_states(rows, deleted)
+        except BaseException:
+            for key, entry in dirty.items():
+                self._dirty.setdefault(key, entry)
+            raise
+
+    async def sweep(self):
+        removed = await sweep_fsm_states(time.time() - self.ttl)
+        if removed:
+            logger.info(f"Удалено брошенных FSM-диалогов: {removed}")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
@@ -5,7 +5,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
 from services.calculations import calculate_calorie_goal, calculate_water_goal, calculate_bmr
 from services.weather import get_weather
-from database import create_or_update_user, get_user
+from database import create_or_update_user, get_user, user_day
 
 router = Router()
 
@@ -33,6 +33,9 @@ async def cmd_start(message: Message):
         "/log_food <продукт> - Записать съеденную еду\n"
         "/log_workout <тип> <минуты> - Записать тренировку\n"
         "/check_progress - Проверить прогресс\n"
+        "/history [7|30|90] - История по дням\n"
+        "/trends - Тренды за неделю и месяц\n"
+        "/chart <вода|калории|вес> [дней] - График за период\n"
         "/food_tips - Рекомендации продуктов с калорийностью\n"
         "/help - Помощь"
     )
@@ -116,7 +119,7 @@ async def process_city(message: Message, state: FSMContext):
         temperature = weather_data['temperature']
         weather_desc = weather_data['description']
         await message.answer(f"Погода в {city}: {weather_desc}, {temperature}°C")
-        await state.update_data(temperature=temperature)
+        await state.update_data(temperature=temperature, utc_offset=weather_data.get('utc_offset'))
     else:
         await message.answer(f"Не удалось получить погоду для {city}. Используем температуру 20°C.")
         await state.update_data(temperature=20)
@@ -240,7 +243,10 @@ async def process_calorie_confirmation(message: Message, state: FSMContext):
         'water_goal': water_goal,
         'logged_water': 0,
         'logged_calories': 0,
-        'burned_calories': 0
+        'burned_calories': 0,
+        'utc_offset': user_data.get('utc_offset'),
+        'temperature': user_data.get('temperature', 20),
+        'counters_day': user_day(user_data.get('utc_offset'))
     }
     
     await create_or_update_user(db_data)
@@ -1,9 +1,17 @@
+import asyncio
+import logging
+from datetime import date, datetime, timezone
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, BufferedInputFile
-from database import get_user
-from services.chart import create_progress_chart
-from services.recommendations import get_low_calorie_recommendations
+from database import get_user, iter_daily_history, user_day, get_weight_series, get_daily_summary
+from config import config
+from services.chart import (
+    create_progress_chart, chart_key, chart_file_ids, create_trend_chart, trend_chart_key, TREND_CHARTS
+)
+from services.recommendations import get_low_calorie_recommendations, get_plan_calorie_limit
+
+logger = logging.getLogger(__name__)
 
 router = Router()
 
@@ -51,9 +59,15 @@ async def cmd_check_progress(message: Message):
     await message.answer(progress_report)
 
     try:
+        key = chart_key(user)
+        file_id = chart_file_ids.get(key) if config.CHART_REUSE_FILE_ID else None
+        if file_id:
+            await message.answer_photo(file_id, caption="📈 График вашего прогресса")
+            return
+        
         chart_buf = await create_progress_chart(user)
 
-        await message.answer_photo(
+        sent = await message.answer_photo(
             BufferedInputFile(
                 chart_buf.read(),
                 filename="progress_chart.png"
@@ -63,8 +77,11 @@ async def cmd_check_progress(message: Message):
         
         chart_buf.close()
         
+        if config.CHART_REUSE_FILE_ID and sent.photo:
+            chart_file_ids.set(key, sent.photo[-1].file_id)
+        
     except Exception as e:
-        print(f"Ошибка при создании графика: {e}")
+        logger.error(f"Ошибка при создании графика: {e}")
         await message.answer("Не удалось создать график прогресса.")
         
 
@@ -89,13 +106,189 @@ async def cmd_food_tips(message: Message):
         f"• Сожжено: {user['burned_calories']:.0f} ккал\n\n"
     )
     
-    if remaining_calories > 0:
-        response += f"Низкокалорийные продукты ({remaining_calories:.0f} ккал осталось):\n"
+    if remaining_calories > 0 and food_recommendations:
+        limit = get_plan_calorie_limit()
+        if remaining_calories > limit:
+            response += (
+                f"Низкокалорийными продуктами {remaining_calories:.0f} ккал не набрать, "
+                f"варианты на максимум ~{limit} ккал:\n"
+            )
+        else:
+            response += f"Варианты из низкокалорийных продуктов на {remaining_calories:.0f} ккал:\n"
         for food in food_recommendations:
             response += f"• {food}\n"
 
     await message.answer(response)
 
+HISTORY_PERIODS = (7, 30, 90)
+MESSAGE_LIMIT = 4000
+
+@router.message(Command("history"))
+async def cmd_history(message: Message):
+    args = message.text.split()
+    period = args[1] if len(args) > 1 else "7"
+    days = int(period) if period.isdigit() else None
+    if days not in HISTORY_PERIODS:
+        await message.answer("Используйте: /history [7|30|90]\nПример: /history 30")
+        return
+    
+    user = await get_user(message.from_user.id)
+    if not user:
+        await message.answer("Профиль не найден. Используйте /set_profile для создания.")
+        return
+    
+    chunks = [f"История за {days} дн.:\n\n"]
+    logged_days = 0
+    try:
+        async with asyncio.timeout(config.HISTORY_TIMEOUT):
+            async for day in iter_daily_history(user['user_id'], days, user['utc_offset']):
+                balance = day['calories_in'] - day['calories_out']
+                line = (
+                    f"{date.fromisoformat(day['day']):%d.%m}: вода {day['water']:.0f} мл, "
+                    f"еда {day['calories_in']:.0f}, тренировки {day['calories_out']:.0f}, "
+                    f"баланс {balance:.0f} ккал\n"
+                )
+                if len(chunks[-1]) + len(line) > MESSAGE_LIMIT:
+                    chunks.append("")
+                chunks[-1] += line
+                logged_days += 1
+    except TimeoutError:
+        await message.answer("История собирается слишком долго, попробуйте период покороче.")
+        return
+    
+    if not logged_days:
+        await message.answer(f"За последние {days} дн. записей нет.")
+        return
+    for chunk in chunks:
+        await message.answer(chunk)
+
+def _trend(current: float, previous: float) -> str:
+    if not previous:
+        return ""
+    change = (current - previous) / previous * 100
+    arrow = "↑" if change > 5 else "↓" if change < -5 else "→"
+    return f" {arrow} {change:+.0f}%"
+
+@router.message(Command("trends"))
+async def cmd_trends(message: Message):
+    user = await get_user(message.from_user.id)
+    if not user:
+        await message.answer("Профиль не найден. Используйте /set_profile для создания.")
+        return
+    
+    today = date.fromisoformat(user_day(user['utc_offset']))
+    columns = ('water', 'calories_in', 'calories_out')
+    week, previous_week, month = ({column: 0.0 for column in columns} for _ in range(3))
+    try:
+        async with asyncio.timeout(config.HISTORY_TIMEOUT):
+            async for day in iter_daily_history(user['user_id'], 30, user['utc_offset']):
+                age = (today - date.fromisoformat(day['day'])).days
+                for totals in (week if age < 7 else previous_week if age < 14 else None, month):
+                    if totals is not None:
+                        for column in columns:
+                            totals[column] += day[column]
+    except TimeoutError:
+        await message.answer("Статистика собирается слишком долго, попробуйте позже.")
+        return
+    
+    if not any(month.values()):
+        await message.answer("За последние 30 дней записей нет.")
+        return
+    
+    for totals, days in ((week, 7), (previous_week, 7), (month, 30)):
+        for column in columns:
+            totals[column] /= days
+        totals['balance'] = totals['calories_in'] - totals['calories_out']
+    
+    lines = ["Средние значения в день: последние 7 дней (к предыдущим 7) / 30 дней\n"]
+    for column, title, unit in (
+        ('water', "Вода", "мл"),
+        ('calories_in', "Потреблено", "ккал"),
+        ('calories_out', "Сожжено", "ккал"),
+        ('balance', "Баланс", "ккал")
+    ):
+        lines.append(
+            f"• {title}: {week[column]:.0f}{_trend(week[column], previous_week[column])}"
+            f" / {month[column]:.0f} {unit}"
+        )
+    lines.append(f"\nЦели: вода {user['water_goal']:.0f} мл, калории {user['calorie_goal']:.0f} ккал")
+    await message.answer("\n".join(lines))
+
+TREND_KINDS = {
+    'water': 'water', 'вода': 'water',
+    'calories': 'calories', 'калории': 'calories',
+    'weight': 'weight', 'вес': 'weight'
+}
+
+async def _trend_series(user: dict, kind: str, days: int) -> tuple:
+    """
+    Ряды для графика: (unix-время, значение) по каждой линии и горизонталь цели
+    """
+    if kind == 'weight':
+        points = await get_weight_series(user['user_id'], days, user['utc_offset'])
+        return [[[x for x, _ in points], [y for _, y in points]]], None
+    
+    columns = ('water',) if kind == 'water' else ('calories_in', 'calories_out')
+    series = [[[], []] for _ in columns]
+    for day in await get_daily_summary(user['user_id'], days, user['utc_offset']):
+        x = datetime.fromisoformat(day['day']).replace(tzinfo=timezone.utc).timestamp()
+        for (xs, ys), column in zip(series, columns):
+            xs.append(x)
+            ys.append(day[column])
+    goal = user['water_goal'] if kind == 'water' else user['calorie_goal']
+    return series, goal
+
+@router.message(Command("chart"))
+async def cmd_chart(message: Message):
+    args = message.text.split()
+    kind = TREND_KINDS.get(args[1].lower()) if len(args) > 1 else None
+    period = args[2] if len(args) > 2 else "30"
+    days = int(period) if period.isdigit() else 0
+    if kind is None or not 1 <= days <= config.TREND_MAX_DAYS:
+        await message.answer(
+            "Используйте: /chart <вода|калории|вес> [дней]\n"
+            "Пример: /chart вода 90"
+        )
+        return
+    
+    user = await get_user(message.from_user.id)
+    if not user:
+        await message.answer("Профиль не найден. Используйте /set_profile для создания.")
+        return
+    
+    try:
+        async with asyncio.timeout(config.HISTORY_TIMEOUT):
+            series, goal = await _trend_series(user, kind, days)
+    except TimeoutError:
+        await message.answer("Данные собираются слишком долго, попробуйте период покороче.")
+        return
+    
+    if not any(xs for xs, _ in series):
+        await message.answer(f"За последние {days} дн. данных для графика нет.")
+        return
+    
+    caption = f"📈 {TREND_CHARTS[kind][0]}, последние {days} дн."
+    try:
+        key = trend_chart_key(kind, series, goal)
+        file_id = chart_file_ids.get(key) if config.CHART_REUSE_FILE_ID else None
+        if file_id:
+            await message.answer_photo(file_id, caption=caption)
+            return
+        
+        chart_buf = await create_trend_chart(kind, series, goal)
+        sent = await message.answer_photo(
+            BufferedInputFile(chart_buf.read(), filename=f"{kind}_trend.png"),
+            caption=caption
+        )
+        chart_buf.close()
+        
+        if config.CHART_REUSE_FILE_ID and sent.photo:
+            chart_file_ids.set(key, sent.photo[-1].file_id)
+    
+    except Exception as e:
+        logger.error(f"Ошибка при создании графика: {e}")
+        await message.answer("Не удалось создать график.")
+
 @router.message(Command("help"))
 async def cmd_help(message: Message):
     help_text = (
@@ -116,6 +309,9 @@ async def cmd_help(message: Message):
         
         "Прогресс:\n"
         "/check_progress - Проверить дневной прогресс\n"
+        "/history [7|30|90] - Итоги по дням за период\n"
+        "/trends - Средние за неделю и месяц\n"
+        "/chart <вода|калории|вес> [дней] - График за период\n"
         "/help - Показать это сообщение\n\n"
         
         "Бот рассчитывает нормы на основе вашего веса, роста, возраста, активности и погоды."
@@ -0,0 +1,65 @@
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import config
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class RotatingLogHandler(RotatingFileHandler):
+    """
+    Ротация файла лога по размеру и по времени, что наступит раньше
+    """
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, interval: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Не блокирует event loop: при переполненной очереди запись отбрасывается
+    """
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+def setup_logging(filename: str = None) -> QueueListener:
+    """
+    Файл и консоль пишет отдельный поток QueueListener, обработчики
+    в event loop только кладут запись в очередь
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    
+    file_handler = RotatingLogHandler(
+        filename or config.LOG_FILE,
+        config.LOG_MAX_BYTES,
+        config.LOG_BACKUP_COUNT,
+        config.LOG_ROTATE_INTERVAL
+    )
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+    
+    records = queue.Queue(config.LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(DroppingQueueHandler(records))
+    root.setLevel(config.LOG_LEVEL)
+    logging.getLogger('aiogram.event').setLevel(logging.WARNING)
+    
+    listener = QueueListener(records, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
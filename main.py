@@ -1,23 +1,12 @@
 import asyncio
 import logging
-import datetime
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from config import config
-from database import init_db, reset_daily_logs
-from middleware.logging_middleware import LoggingMiddleware
-from handlers.profile import router as profile_router
-from handlers.tracking import router as tracking_router
-from handlers.progress import router as progress_router
+from database import init_db
+from bootstrap import start_services, stop_services, create_bot, create_dispatcher
+from webhook import run_webhook
+from log_config import setup_logging
+from workers import run_sharded
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 async def main():
@@ -26,37 +15,30 @@ async def main():
         return
     
     await init_db()
-    logger.info("База данных инициализирована")
     
-    bot = Bot(token=config.BOT_TOKEN)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
-    
-    dp.update.middleware(LoggingMiddleware())
-    
-    dp.include_router(profile_router)
-    dp.include_router(tracking_router)
-    dp.include_router(progress_router)
-    
-    async def reset_logs_at_midnight():
-        while True:
-            now = datetime.datetime.now()
-            next_midnight = (now + datetime.timedelta(days=1)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            wait_seconds = (next_midnight - now).total_seconds()
-            
-            await asyncio.sleep(wait_seconds)
-            await reset_daily_logs()
-            logger.info("Дневные логи сброшены (полночь)")
+    if config.WORKERS > 0:
+        logger.info(f"Бот запускается ({config.BOT_MODE}, воркеров: {config.WORKERS})...")
+        await run_sharded(config.WORKERS)
+        return
     
-    asyncio.create_task(reset_logs_at_midnight())
+    storage = await start_services()
+    bot = create_bot()
+    dp = create_dispatcher(storage)
     
-    logger.info("Бот запускается...")
-    await dp.start_polling(bot)
+    logger.info(f"Бот запускается ({config.BOT_MODE})...")
+    try:
+        if config.BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            await dp.start_polling(bot)
+    finally:
+        await stop_services(storage)
 
 if __name__ == "__main__":
+    log_listener = setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Бот остановлен")
\ No newline at end of file
+        logger.info("Бот остановлен")
+    finally:
+        log_listener.stop()
@@ -0,0 +1,150 @@
+import asyncio
+import bisect
+import functools
+import logging
+import time
+from typing import Callable, Dict, Tuple
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+class GaugeCallback:
+    """
+    Значение считывается в момент выгрузки метрик
+    """
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._sources: Dict[tuple, Callable[[], float]] = {}
+
+    def track(self, source: Callable[[], float], *labels):
+        self._sources[labels] = source
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, source in self._sources.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {source()}")
+        return lines
+
+handler_latency = Histogram("bot_handler_seconds", "Время обработки хендлером", ("handler",))
+handler_errors = Counter("bot_handler_errors_total", "Исключения в хендлерах", ("handler",))
+db_latency = Histogram("bot_db_query_seconds", "Время вызова функций database.py", ("query",))
+api_latency = Histogram("bot_api_request_seconds", "Время внешних HTTP-запросов", ("api",))
+api_errors = Counter("bot_api_errors_total", "Неуспешные внешние запросы", ("api",))
+loop_lag = Histogram("bot_event_loop_lag_seconds", "Задержка event loop")
+outbound_wait = Histogram("bot_outbound_wait_seconds", "Ожидание разрешения на отправку", ("lane",))
+outbound_retries = Counter("bot_outbound_retries_total", "Повторы после ответа 429")
+throttled = Counter("bot_throttled_total", "Сообщения, отброшенные ограничением частоты", ("command",))
+cache_hit_rate = GaugeCallback("bot_cache_hit_ratio", "Доля попаданий в кэш", ("cache",))
+cache_size = GaugeCallback("bot_cache_entries", "Число записей в кэше", ("cache",))
+
+REGISTRY = [
+    handler_latency, handler_errors, db_latency, api_latency, api_errors,
+    loop_lag, throttled, outbound_wait, outbound_retries, cache_hit_rate, cache_size
+]
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def timed(histogram: Histogram, label: str = None, errors: Counter = None):
+    """
+    Декоратор для async-функций: пишет длительность вызова в гистограмму
+    """
+    def decorator(func):
+        name = label or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(name)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, name)
+
+        return wrapper
+    return decorator
+
+def track_cache(name: str, cache):
+    cache_hit_rate.track(lambda: cache.stats()['hit_rate'], name)
+    cache_size.track(lambda: len(cache), name)
+
+async def monitor_loop_lag(interval: float = 0.5):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, time.perf_counter() - start - interval))
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
@@ -1,45 +1,57 @@
 import logging
+import time
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
-from aiogram.types import Update, Message, CallbackQuery
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import Update, Message, CallbackQuery, InlineQuery
 
 logger = logging.getLogger(__name__)
 
+def _event_text(event: Any) -> str:
+    if isinstance(event, Message):
+        return event.text or event.caption or ""
+    if isinstance(event, CallbackQuery):
+        return event.data or ""
+    if isinstance(event, InlineQuery):
+        return event.query
+    return ""
+
 class LoggingMiddleware(BaseMiddleware):
+    """
+    Одна структурированная запись на апдейт любого типа с временем обработки
+    """
     async def __call__(
         self,
         handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
         event: Update,
         data: Dict[str, Any]
     ) -> Any:
-        
-        user = event.message.from_user
-        chat_id = event.message.chat.id
-        text = event.message.text or ""
-        
-        if user:
-            logger.info(
-                f"User: {user.id} (@{user.username}) | "
-                f"Text/Data: {text[:50]} | "
-                f"Chat: {chat_id}"
-            )
-        else:
-            logger.info(f"Update without user: {event.update_id}")
-        
+        start = time.perf_counter()
+        status = "ok"
         try:
             result = await handler(event, data)
-            if text:
-                logger.info(f"Command {text} processed successfully")
+            if result is UNHANDLED:
+                status = "unhandled"
             return result
         except Exception as e:
-            logger.error(f"Error processing update: {e}")
-            raise
\ No newline at end of file
+            status = f"error: {e}"
+            raise
+        finally:
+            user = data.get("event_from_user")
+            chat = data.get("event_chat")
+            record = {
+                "update_id": event.update_id,
+                "type": event.event_type,
+                "user_id": user.id if user else None,
+                "username": user.username if user else None,
+                "chat_id": chat.id if chat else None,
+                "text": _event_text(event.event)[:50],
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+            }
+            level = logging.ERROR if status.startswith("error") else logging.INFO
+            logger.log(
+                level,
+                " | ".join(f"{key}={value}" for key, value in record.items()),
+                extra={"update": record}
+            )
@@ -0,0 +1,26 @@
+import time
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from metrics import handler_latency, handler_errors
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Гистограмма времени и счетчик ошибок по каждому хендлеру
+    """
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else type(event).__name__
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(name)
+            raise
+        finally:
+            handler_latency.observe(time.perf_counter() - start, name)
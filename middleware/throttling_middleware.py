@@ -0,0 +1,94 @@
+import time
+from typing import Callable, Dict, Any, Awaitable, Optional, Tuple
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+from config import config
+from metrics import throttled
+from services.rate_limit import TokenBuckets
+
+# (токенов в секунду, емкость) — дорогие команды ходят во внешние API или рисуют графики
+COMMAND_LIMITS = {
+    'log_food': (0.2, 3),
+    'check_progress': (0.1, 3),
+    'chart': (0.1, 3),
+    'history': (0.2, 3),
+    'trends': (0.2, 3),
+    'set_profile': (0.1, 3),
+    'food_tips': (0.5, 5)
+}
+# остальные команды, включая несуществующие, делят одну корзину с мягким лимитом;
+# под этим же именем они попадают в метрики, чтобы число серий было ограничено
+OTHER_COMMANDS = 'other'
+DEFAULT_LIMIT = (2.0, 10)
+
+def command_name(text: Optional[str]) -> Optional[str]:
+    if not text or not text.startswith('/'):
+        return None
+    return text.split(maxsplit=1)[0][1:].split('@')[0].lower()
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты сообщений: общая корзина на пользователя и отдельная на
+    каждую дорогую команду. Лишние сообщения отбрасываются до фильтров и хендлеров,
+    предупреждение отправляется не чаще раза в notice_interval секунд
+    """
+    def __init__(self, rate: float = None, burst: float = None,
+                 sweep_interval: float = None, notice_interval: float = None):
+        self.user_limit = (
+            config.THROTTLE_RATE if rate is None else rate,
+            config.THROTTLE_BURST if burst is None else burst
+        )
+        self.sweep_interval = config.THROTTLE_SWEEP_INTERVAL if sweep_interval is None else sweep_interval
+        self.notice_interval = config.THROTTLE_NOTICE_INTERVAL if notice_interval is None else notice_interval
+        self.buckets = TokenBuckets()
+        self._notices: Dict[int, float] = {}
+        self._next_sweep = time.monotonic() + self.sweep_interval
+
+    def _limit(self, name: str) -> Tuple[float, float]:
+        if name == '*':
+            return self.user_limit
+        return COMMAND_LIMITS.get(name, DEFAULT_LIMIT)
+
+    def _sweep(self, now: float):
+        self.buckets.sweep(now, lambda key: self._limit(key[1]))
+        self._notices = {
+            user_id: notified for user_id, notified in self._notices.items()
+            if now - notified < self.notice_interval
+        }
+        self._next_sweep = now + self.sweep_interval
+
+    def _check(self, user_id: int, command: Optional[str], now: float) -> float:
+        wait = self.buckets.take((user_id, '*'), *self.user_limit, now)
+        if wait or command is None:
+            return wait
+        wait = self.buckets.take((user_id, command), *self._limit(command), now)
+        if wait:
+            self.buckets.refund((user_id, '*'))
+        return wait
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        command = command_name(event.text)
+        if command is not None and command not in COMMAND_LIMITS:
+            command = OTHER_COMMANDS
+        wait = self._check(user.id, command, now)
+        if not wait:
+            return await handler(event, data)
+
+        throttled.inc(command or "message")
+        if now - self._notices.get(user.id, float('-inf')) >= self.notice_interval:
+            self._notices[user.id] = now
+            await event.answer(f"Слишком много запросов. Попробуйте через {max(1, round(wait))} с.")
+        return None
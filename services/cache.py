@@ -0,0 +1,84 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+class TTLCache:
+    """
+    LRU-кэш с ограничением по числу записей и временем жизни записи
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            return default
+        return item[1]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        return default if item is None else item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key) is not None
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0
+        }
+
+class SingleFlight:
+    """
+    Схлопывает одновременные вызовы с одинаковым ключом в один запрос
+    """
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -23,11 +23,48 @@ def calculate_water_goal(weight: float, activity_minutes: int, temperature: floa
     
     activity_water = (activity_minutes // 30) * config.WATER_PER_30_MIN
     
-    weather_water = config.WATER_FOR_HOT_WEATHER if temperature > 25 else 0
+    weather_water = config.WATER_FOR_HOT_WEATHER if temperature > config.HOT_WEATHER_TEMPERATURE else 0
     
     total_water = base_water + activity_water + weather_water
     return round(total_water)
 
+def _numpy():
+    import numpy
+    return numpy
+
+def calculate_bmr_batch(weight, height, age, gender):
+    """
+    Векторная версия calculate_bmr: массивы одинаковой длины, результат совпадает поэлементно
+    """
+    np = _numpy()
+    weight, height, age = (np.asarray(column, dtype=np.float64) for column in (weight, height, age))
+    # различных значений пола единицы, поэтому lower() применяется только к ним
+    values, index = np.unique(np.asarray(gender, dtype=str), return_inverse=True)
+    male = (np.char.lower(values) == 'мужчина')[index]
+    base = 10 * weight + 6.25 * height - 5 * age
+    return np.where(male, base + 5, base - 161)
+
+def calculate_calorie_goal_batch(bmr, activity_minutes, goal):
+    np = _numpy()
+    bmr = np.asarray(bmr, dtype=np.float64)
+    activity_factor = 1.2 + (np.asarray(activity_minutes, dtype=np.float64) / 60) * 0.2
+    daily_calories = bmr * activity_factor
+    goal = np.broadcast_to(np.asarray(goal, dtype=str), daily_calories.shape)
+    daily_calories = np.where(goal == 'похудеть', daily_calories * 0.85,
+                              np.where(goal == 'набрать', daily_calories * 1.15, daily_calories))
+    return np.round(daily_calories).astype(np.int64)
+
+def calculate_water_goal_batch(weight, activity_minutes, temperature=20):
+    np = _numpy()
+    base_water = np.asarray(weight, dtype=np.float64) * config.WATER_PER_KG
+    
+    activity_water = np.floor_divide(np.asarray(activity_minutes, dtype=np.float64), 30) * config.WATER_PER_30_MIN
+    
+    weather_water = np.where(np.asarray(temperature, dtype=np.float64) > config.HOT_WEATHER_TEMPERATURE, config.WATER_FOR_HOT_WEATHER, 0)
+    
+    total_water = base_water + activity_water + weather_water
+    return np.round(total_water).astype(np.int64)
+
 def calculate_workout_calories(workout_type: str, duration: int, weight: float) -> float:
     met_values = {
         'бег': 8.0,
@@ -1,22 +1,293 @@
-import matplotlib.pyplot as plt
+import asyncio
+import hashlib
 import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from config import config
+from services.cache import TTLCache, SingleFlight
 
-async def create_progress_chart(user_data: dict) -> io.BytesIO:
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
+_executor: ProcessPoolExecutor = None
+_slots: asyncio.Semaphore = None
+
+class ChartCache:
+    """
+    LRU-кэш готовых PNG с ограничением по суммарному размеру в байтах
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> bytes:
+        png = self._data.get(key)
+        if png is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return png
+
+    def set(self, key: str, png: bytes):
+        if len(png) > self.max_bytes:
+            return
+        if key in self._data:
+            self.size -= len(self._data.pop(key))
+        self._data[key] = png
+        self.size += len(png)
+        while self.size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0
+        }
+
+chart_cache = ChartCache(config.CHART_CACHE_BYTES)
+chart_file_ids = TTLCache(config.CHART_FILE_ID_CACHE_SIZE, config.CHART_FILE_ID_TTL)
+_in_flight = SingleFlight()
+# ключ -> отрисовка в пуле, которая еще идет; ее результат дожидаются повторные
+# запросы вместо новой отрисовки
+_rendering = {}
+
+def _progress_args(user_data: dict) -> tuple:
+    return (
+        user_data['logged_water'],
+        user_data['water_goal'],
+        user_data['logged_calories'],
+        user_data['burned_calories']
+    )
+
+def chart_key(user_data: dict) -> str:
+    """
+    Ключ графика — хэш входных данных: одинаковые данные дают одинаковую картинку
+    """
+    payload = repr(tuple(float(value or 0) for value in _progress_args(user_data)))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def trend_chart_key(kind: str, series: list, goal: float = None) -> str:
+    payload = repr((kind, series, goal, config.CHART_MAX_POINTS))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _load_matplotlib() -> tuple:
+    """
+    matplotlib импортируется при первой отрисовке, а не при старте бота
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    return Figure, FigureCanvasAgg
+
+def render_progress_chart(logged_water: float, water_goal: float,
+                          logged_calories: float, burned_calories: float) -> bytes:
+    """
+    Отрисовка через объектный API Agg без глобального состояния pyplot,
+    безопасна для вызова из пула процессов или потоков
+    """
+    Figure, FigureCanvasAgg = _load_matplotlib()
+    fig = Figure(figsize=(10, 4))
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(1, 2)
     
     water_labels = ['Выпито', 'Осталось']
-    water_values = [user_data['logged_water'], 
-                   max(0, user_data['water_goal'] - user_data['logged_water'])]
+    water_values = [logged_water, max(0, water_goal - logged_water)]
     ax1.pie(water_values, labels=water_labels, autopct='%1.1f%%')
     ax1.set_title('Прогресс по воде')
     
     calorie_labels = ['Потреблено', 'Сожжено']
-    calorie_values = [user_data['logged_calories'], user_data['burned_calories']]
+    calorie_values = [logged_calories, burned_calories]
     ax2.bar(calorie_labels, calorie_values)
     ax2.set_title('Калории')
     
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    plt.close()
-    return buf
\ No newline at end of file
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+def downsample_lttb(xs: list, ys: list, threshold: int) -> tuple:
+    """
+    Largest-Triangle-Three-Buckets: оставляет threshold точек, сохраняя форму
+    ряда (пики и провалы), первая и последняя точки сохраняются всегда
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return xs, ys
+    
+    every = (n - 2) / (threshold - 2)
+    sampled_x, sampled_y = [xs[0]], [ys[0]]
+    selected = 0
+    for bucket in range(threshold - 2):
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+        
+        point_x, point_y = xs[selected], ys[selected]
+        best_area = -1.0
+        for index in range(int(bucket * every) + 1, next_start):
+            area = abs((point_x - avg_x) * (ys[index] - point_y) - (point_x - xs[index]) * (avg_y - point_y))
+            if area > best_area:
+                best_area, selected = area, index
+        sampled_x.append(xs[selected])
+        sampled_y.append(ys[selected])
+    
+    sampled_x.append(xs[-1])
+    sampled_y.append(ys[-1])
+    return sampled_x, sampled_y
+
+TREND_CHARTS = {
+    'water': ('Вода, мл в день', ('Выпито',)),
+    'calories': ('Калории в день', ('Потреблено', 'Сожжено')),
+    'weight': ('Вес, кг', ('Вес',))
+}
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+def _trend_template(kind: str) -> tuple:
+    """
+    Фигура, оси, линии и форматирование дат строятся один раз на тип графика
+    в каждом процессе, дальше меняются только данные линий
+    """
+    with _templates_lock:
+        template = _templates.get(kind)
+        if template is None:
+            Figure, FigureCanvasAgg = _load_matplotlib()
+            from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+            
+            title, labels = TREND_CHARTS[kind]
+            fig = Figure(figsize=(10, 4))
+            FigureCanvasAgg(fig)
+            ax = fig.subplots()
+            ax.set_title(title)
+            ax.grid(alpha=0.3)
+            lines = [ax.plot([], [], marker='.', label=label)[0] for label in labels]
+            goal_line = ax.axhline(0, linestyle='--', color='gray', visible=False)
+            locator = AutoDateLocator()
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+            if len(labels) > 1:
+                ax.legend(loc='upper left')
+            template = _templates[kind] = (fig, ax, lines, goal_line, threading.Lock())
+        return template
+
+def render_trend_chart(kind: str, series: list, goal: float = None, max_points: int = 200) -> bytes:
+    """
+    series — по паре списков (unix-время в секундах, значение) на каждую линию
+    графика; длинные ряды прореживаются до max_points точек
+    """
+    fig, ax, lines, goal_line, lock = _trend_template(kind)
+    with lock:
+        for line, (xs, ys) in zip(lines, series):
+            xs, ys = downsample_lttb(xs, ys, max_points)
+            line.set_data([x / 86400 for x in xs], ys)
+        goal_line.set_visible(goal is not None)
+        if goal is not None:
+            goal_line.set_ydata([goal, goal])
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+        
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png')
+        return buf.getvalue()
+
+def start_chart_pool(workers: int = None):
+    global _executor, _slots
+    workers = config.CHART_WORKERS if workers is None else workers
+    if workers > 0:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+    _slots = asyncio.Semaphore(max(workers, 1) + config.CHART_QUEUE_SIZE)
+
+def stop_chart_pool():
+    global _executor, _slots
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    _slots = None
+    _rendering.clear()
+
+async def warm_up_chart_pool(delay: float = None):
+    """
+    Фоновый прогрев: импорт matplotlib в процессах пула сразу после их создания
+    """
+    delay = config.CHART_WARM_UP_DELAY if delay is None else delay
+    if delay:
+        await asyncio.sleep(delay)
+    if _executor is not None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(_executor, _load_matplotlib)
+            for _ in range(_executor._max_workers)
+        ], return_exceptions=True)
+    else:
+        await asyncio.to_thread(_load_matplotlib)
+
+def _render(render, *args) -> asyncio.Future:
+    return asyncio.get_running_loop().run_in_executor(_executor, render, *args)
+
+def _render_done(slots: asyncio.Semaphore, key: str, future: asyncio.Future):
+    """
+    Слот освобождается, когда отрисовка действительно закончилась, а не когда
+    истек таймаут ожидания; готовый PNG попадает в кэш, даже если вызвавший
+    его уже не ждет
+    """
+    slots.release()
+    if _rendering.get(key) is future:
+        del _rendering[key]
+    if not future.cancelled() and future.exception() is None:
+        chart_cache.set(key, future.result())
+
+async def create_progress_chart(user_data: dict) -> io.BytesIO:
+    key = chart_key(user_data)
+    png = chart_cache.get(key)
+    if png is None:
+        png = await _in_flight.do(key, lambda: _render_and_cache(key, render_progress_chart, _progress_args(user_data)))
+    return io.BytesIO(png)
+
+async def create_trend_chart(kind: str, series: list, goal: float = None) -> io.BytesIO:
+    key = trend_chart_key(kind, series, goal)
+    png = chart_cache.get(key)
+    if png is None:
+        args = (kind, series, goal, config.CHART_MAX_POINTS)
+        png = await _in_flight.do(key, lambda: _render_and_cache(key, render_trend_chart, args))
+    return io.BytesIO(png)
+
+async def _render_and_cache(key: str, render, args: tuple) -> bytes:
+    if _slots is None:
+        png = await _render(render, *args)
+        chart_cache.set(key, png)
+        return png
+    
+    future = _rendering.get(key)
+    if future is None:
+        slots = _slots
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.CHART_TIMEOUT
+        await asyncio.wait_for(slots.acquire(), config.CHART_TIMEOUT)
+        try:
+            future = _render(render, *args)
+        except BaseException:
+            slots.release()
+            raise
+        _rendering[key] = future
+        future.add_done_callback(lambda done: _render_done(slots, key, done))
+        timeout = max(0, deadline - loop.time())
+    else:
+        timeout = config.CHART_TIMEOUT
+    return await asyncio.wait_for(asyncio.shield(future), timeout)
@@ -1,11 +1,64 @@
-import aiohttp
 import logging
+import time
+from config import config
+from database import get_cached_food, put_cached_food
+from services.cache import TTLCache, SingleFlight
+from services.food_catalog import find_food, normalize_product_name
+from services.http_client import http_client
+from metrics import api_latency, api_errors, timed
+
+food_cache = TTLCache(config.FOOD_CACHE_SIZE, config.FOOD_CACHE_TTL)
+_in_flight = SingleFlight()
 
 async def get_food_info(product_name: str):
+    """
+    Информация о продукте: кэш в памяти, локальный каталог, кэш в SQLite, затем OpenFoodFacts
+    """
+    key = normalize_product_name(product_name)
+    cached = food_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
+    return dict(await _in_flight.do(key, lambda: _lookup_food_info(key, product_name)))
+
+async def _lookup_food_info(key: str, product_name: str) -> dict:
+    try:
+        food_info = await find_food(product_name)
+    except Exception as e:
+        logging.error(f"Ошибка локального каталога продуктов: {e}")
+        food_info = None
+    
+    if food_info is not None:
+        food_cache.set(key, food_info)
+        return food_info
+    
+    try:
+        stored = await get_cached_food(key)
+    except Exception as e:
+        logging.error(f"Ошибка кэша продуктов: {e}")
+        stored = None
+    
+    if stored is not None:
+        food_info, expires_at = stored
+        food_cache.set(key, food_info, expires_at - time.time())
+        return food_info
+    
+    food_info = await fetch_food_info(product_name)
+    if food_info['success'] or food_info.get('not_found'):
+        ttl = config.FOOD_CACHE_TTL if food_info['success'] else config.FOOD_NEGATIVE_CACHE_TTL
+        food_cache.set(key, food_info, ttl)
+        try:
+            await put_cached_food(key, food_info, ttl)
+        except Exception as e:
+            logging.error(f"Ошибка кэша продуктов: {e}")
+    return food_info
+
+@timed(api_latency, 'openfoodfacts')
+async def fetch_food_info(product_name: str):
     """
     Получение информации о продукте через OpenFoodFacts API
     """
-    url = "https://world.openfoodfacts.org/cgi/search.pl"
+    url = config.OPENFOODFACTS_URL
     params = {
         'action': 'process',
         'search_terms': product_name,
@@ -14,7 +67,7 @@ async def get_food_info(product_name: str):
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client() as session:
             async with session.get(url, params=params) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -33,9 +86,11 @@ async def get_food_info(product_name: str):
                             'name': product_name,
                             'calories': 0,
                             'error': 'Продукт не найден',
+                            'not_found': True,
                             'success': False
                         }
                 else:
+                    api_errors.inc('openfoodfacts')
                     return {
                         'name': product_name,
                         'calories': 0,
@@ -43,6 +98,7 @@ async def get_food_info(product_name: str):
                         'success': False
                     }
     except Exception as e:
+        api_errors.inc('openfoodfacts')
         logging.error(f"Ошибка API: {e}")
         return {
             'name': product_name,
@@ -0,0 +1,213 @@
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import sys
+from collections import defaultdict
+from typing import Iterator, Optional
+from config import config
+from database import (
+    init_db, open_pool, close_pool,
+    clear_food_catalog, insert_food_catalog, get_top_food_catalog, search_food_catalog
+)
+
+_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ией',
+    'ий', 'ый', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ых', 'их', 'ым', 'им',
+    'ую', 'юю', 'ов', 'ев', 'ей', 'ах', 'ях', 'ом', 'ем', 'ам', 'ям',
+    'ы', 'и', 'а', 'я', 'о', 'е', 'у', 'ю', 'ь', 'й'
+], key=len, reverse=True)
+
+def normalize_product_name(product_name: str) -> str:
+    return ' '.join(product_name.lower().replace('ё', 'е').split())
+
+def stem_word(word: str) -> str:
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+def stem_name(product_name: str) -> str:
+    """
+    Грубая нормализация падежей и чисел: "бананы" -> "банан", "гречку" -> "гречк"
+    """
+    return ' '.join(stem_word(word) for word in normalize_product_name(product_name).split())
+
+def trigrams(text: str, padded: bool = True) -> set:
+    if padded:
+        text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def similarity(a: str, b: str) -> float:
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    common = len(grams_a & grams_b)
+    return common / (len(grams_a) + len(grams_b) - common)
+
+class TrigramIndex:
+    """
+    Индекс в памяти для самых популярных продуктов: точное совпадение основы
+    за O(1), иначе поиск по общим триграммам
+    """
+    def __init__(self, items: list = ()):
+        self._by_stem = {}
+        self._items = []
+        self._grams = []
+        self._postings = defaultdict(list)
+        for item in items:
+            self.add(item)
+
+    def add(self, item: dict):
+        if item['stem'] in self._by_stem:
+            return
+        self._by_stem[item['stem']] = item
+        position = len(self._items)
+        grams = trigrams(item['stem'])
+        self._items.append(item)
+        self._grams.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(position)
+
+    def search(self, stem: str, min_similarity: float) -> Optional[dict]:
+        exact = self._by_stem.get(stem)
+        if exact is not None:
+            return exact
+
+        grams = trigrams(stem)
+        counts = defaultdict(int)
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                counts[position] += 1
+
+        best, best_score = None, 0.0
+        for position, common in counts.items():
+            score = common / (len(grams) + self._grams[position] - common)
+            if score > best_score:
+                best, best_score = self._items[position], score
+        return best if best_score >= min_similarity else None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+catalog_index = TrigramIndex()
+
+async def load_catalog_index(limit: int = None) -> int:
+    global catalog_index
+    rows = await get_top_food_catalog(limit or config.FOOD_CATALOG_TOP_N)
+    catalog_index = TrigramIndex(rows)
+    return len(catalog_index)
+
+def _as_food_info(item: dict) -> dict:
+    return {
+        'name': item['name'],
+        'calories': item['calories'],
+        'brand': item['brand'] or '',
+        'success': True
+    }
+
+async def find_food(product_name: str) -> Optional[dict]:
+    """
+    Поиск продукта в локальном каталоге, None — если подходящего нет
+    """
+    stem = stem_name(product_name)
+    if not stem:
+        return None
+
+    item = catalog_index.search(stem, config.FOOD_CATALOG_MIN_SIMILARITY)
+    if item is not None:
+        return _as_food_info(item)
+
+    candidates = await search_food_catalog(
+        stem,
+        sorted(trigrams(stem, padded=False)),
+        config.FOOD_CATALOG_CANDIDATES
+    )
+    scored = [(similarity(stem, candidate['stem']), candidate['popularity'], candidate) for candidate in candidates]
+    best = max(scored, key=lambda entry: entry[:2], default=None)
+    if best is None or best[0] < config.FOOD_CATALOG_MIN_SIMILARITY:
+        return None
+    return _as_food_info(best[2])
+
+def _open_dump(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_int(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def iter_products(path: str) -> Iterator[tuple]:
+    """
+    Построчно читает дамп OpenFoodFacts (CSV/TSV или JSONL, можно .gz)
+    и отдает кортежи (name, stem, calories, brand, popularity)
+    """
+    is_jsonl = '.jsonl' in path or '.json' in path
+    with _open_dump(path) as dump:
+        if is_jsonl:
+            records = (json.loads(line) for line in dump if line.strip())
+        else:
+            csv.field_size_limit(sys.maxsize)
+            header = dump.readline()
+            delimiter = '\t' if '\t' in header else ','
+            fields = next(csv.reader([header], delimiter=delimiter))
+            records = csv.DictReader(dump, fieldnames=fields, delimiter=delimiter)
+
+        for record in records:
+            name = (record.get('product_name') or '').strip()
+            nutriments = record.get('nutriments') or {}
+            calories = _to_float(nutriments.get('energy-kcal_100g', record.get('energy-kcal_100g')))
+            if not name or calories is None:
+                continue
+            yield (
+                name,
+                stem_name(name),
+                calories,
+                (record.get('brands') or '').strip(),
+                _to_int(record.get('unique_scans_n') or record.get('scans_n'))
+            )
+
+async def load_catalog(path: str, batch_size: int = 5000, replace: bool = True) -> int:
+    if replace:
+        await clear_food_catalog()
+
+    total = 0
+    batch = []
+    for product in iter_products(path):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            await insert_food_catalog(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        await insert_food_catalog(batch)
+        total += len(batch)
+
+    await load_catalog_index()
+    return total
+
+async def _main(path: str):
+    await init_db()
+    await open_pool()
+    try:
+        total = await load_catalog(path)
+        logging.info(f"Загружено продуктов в каталог: {total}")
+    finally:
+        await close_pool()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        print("Использование: python -m services.food_catalog <дамп OpenFoodFacts .csv/.jsonl[.gz]>")
+        sys.exit(1)
+    asyncio.run(_main(sys.argv[1]))
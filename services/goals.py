@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from config import config
+from services.calculations import calculate_water_goal_batch
+from services.weather import get_weather, normalize_city
+from database import (
+    init_db, open_pool, close_pool,
+    get_goal_inputs, update_water_goals, get_user_cities, update_city_temperature
+)
+
+logger = logging.getLogger(__name__)
+
+async def recompute_water_goals(batch_size: int = 100000) -> int:
+    """
+    Пересчитывает water_goal всех пользователей по текущим константам Config.
+    Профили читаются пачками по user_id, в базу пишутся только изменившиеся цели.
+    Возвращает число обновленных пользователей
+    """
+    import numpy as np
+    
+    after_user_id = 0
+    updated = 0
+    while True:
+        rows = await get_goal_inputs(after_user_id, batch_size)
+        if not rows:
+            break
+        after_user_id = rows[-1][0]
+
+        user_ids, weight, activity_minutes, temperature, current = zip(*rows)
+        goals = calculate_water_goal_batch(weight, activity_minutes, temperature)
+        changed = goals != np.asarray(current, dtype=np.float64)
+
+        changed_rows = list(zip(goals[changed].tolist(), np.asarray(user_ids)[changed].tolist()))
+        await update_water_goals(changed_rows)
+        updated += len(changed_rows)
+    return updated
+
+async def refresh_weather_goals(concurrency: int = None, shard: tuple = None) -> int:
+    """
+    Запрашивает погоду один раз на город (с ограничением параллельности) и
+    обновляет цели по воде тем, у кого сменился статус жаркой погоды.
+    shard (index, count) ограничивает обновление пользователями одного воркера
+    """
+    cities = {}
+    for city in await get_user_cities(shard):
+        cities.setdefault(normalize_city(city), []).append(city)
+
+    slots = asyncio.Semaphore(concurrency or config.WEATHER_REFRESH_CONCURRENCY)
+
+    async def refresh_city(spellings: list) -> int:
+        async with slots:
+            weather = await get_weather(spellings[0])
+        if not weather.get('success', False) or weather.get('stale'):
+            return 0
+        updated = 0
+        for city in spellings:
+            updated += await update_city_temperature(city, weather['temperature'], shard)
+        return updated
+
+    results = await asyncio.gather(*[refresh_city(spellings) for spellings in cities.values()])
+    return sum(results)
+
+async def run_weather_refresh(interval: float = None, shard: tuple = None):
+    interval = interval or config.WEATHER_REFRESH_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            updated = await refresh_weather_goals(shard=shard)
+            logger.info(f"Погода обновлена, изменены цели по воде: {updated}")
+        except Exception as e:
+            logger.error(f"Ошибка обновления погоды: {e}")
+
+async def _main():
+    await init_db()
+    await open_pool()
+    try:
+        updated = await recompute_water_goals()
+        logger.info(f"Пересчитаны цели по воде: {updated}")
+    finally:
+        await close_pool()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,42 @@
+import aiohttp
+from contextlib import asynccontextmanager
+from config import config
+
+session: aiohttp.ClientSession = None
+
+def create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=config.HTTP_POOL_LIMIT,
+        limit_per_host=config.HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=config.HTTP_TOTAL_TIMEOUT,
+        connect=config.HTTP_CONNECT_TIMEOUT,
+        sock_read=config.HTTP_READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+async def open_http_session() -> aiohttp.ClientSession:
+    global session
+    if session is None or session.closed:
+        session = create_session()
+    return session
+
+async def close_http_session():
+    global session
+    if session is not None:
+        await session.close()
+        session = None
+
+@asynccontextmanager
+async def http_client():
+    """
+    Общая сессия приложения, а вне main() (скрипты, бенчмарки) — временная
+    """
+    if session is not None and not session.closed:
+        yield session
+    else:
+        async with create_session() as temporary:
+            yield temporary
@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from config import config
+from metrics import outbound_wait, outbound_retries
+from services.rate_limit import TokenBuckets
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE, BULK = 0, 1
+LANE_NAMES = ('interactive', 'bulk')
+SCAN_LIMIT = 1000
+GLOBAL = 'global'
+
+_priority = contextvars.ContextVar('outbound_priority', default=INTERACTIVE)
+
+@contextmanager
+def bulk_priority():
+    """
+    Отправки внутри блока идут в низкоприоритетную очередь (рассылки, напоминания)
+    """
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class OutboundLimiter:
+    """
+    Очередь на отправку сообщений с общей корзиной токенов на бота и отдельной на
+    каждый чат. Ответы пользователям обслуживаются раньше рассылок; если чат уперся
+    в лимит, очередь пропускает вперед сообщения в другие чаты. Длина каждой очереди
+    ограничена — при переполнении отправитель ждет свободного места
+    """
+    def __init__(self, global_rate: float = None, global_burst: float = None,
+                 chat_rate: float = None, chat_burst: float = None,
+                 group_rate: float = None, group_burst: float = None,
+                 queue_size: int = None, sweep_interval: float = 60):
+        self.global_limit = (
+            config.OUTBOUND_GLOBAL_RATE / max(1, config.WORKERS) if global_rate is None else global_rate,
+            config.OUTBOUND_GLOBAL_BURST if global_burst is None else global_burst
+        )
+        self.chat_limit = (
+            config.OUTBOUND_CHAT_RATE if chat_rate is None else chat_rate,
+            config.OUTBOUND_CHAT_BURST if chat_burst is None else chat_burst
+        )
+        self.group_limit = (
+            config.OUTBOUND_GROUP_RATE if group_rate is None else group_rate,
+            config.OUTBOUND_GROUP_BURST if group_burst is None else group_burst
+        )
+        self.queue_size = config.OUTBOUND_QUEUE_SIZE if queue_size is None else queue_size
+        self.sweep_interval = sweep_interval
+        self.lanes = (deque(), deque())
+        self._buckets = TokenBuckets()
+        self._blocked = {}
+        self._wakeup = None
+        self._task = None
+
+    def _limit(self, key) -> tuple:
+        if key == GLOBAL:
+            return self.global_limit
+        if isinstance(key, int) and key > 0:
+            return self.chat_limit
+        return self.group_limit
+
+    def _start(self):
+        self._space = tuple(asyncio.Semaphore(self.queue_size) for _ in self.lanes)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def acquire(self, chat_id, priority: int = None):
+        """
+        Ждет разрешения на отправку сообщения в чат
+        """
+        if self._task is None:
+            self._start()
+        priority = _priority.get() if priority is None else priority
+        start = time.perf_counter()
+        async with self._space[priority]:
+            future = asyncio.get_running_loop().create_future()
+            self.lanes[priority].append((chat_id, future))
+            self._wakeup.set()
+            await future
+        outbound_wait.observe(time.perf_counter() - start, LANE_NAMES[priority])
+
+    def block(self, chat_id, seconds: float):
+        """
+        Telegram ответил 429: чат не получает разрешений retry_after секунд
+        """
+        self._blocked[chat_id] = time.monotonic() + seconds
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _grant(self, now: float):
+        """
+        Выдает все разрешения, возможные сейчас; возвращает, через сколько секунд
+        стоит проверить очереди снова, или None, если они пусты
+        """
+        wait = None
+        for lane in self.lanes:
+            waiting = []
+            scanned = 0
+            while lane and scanned < SCAN_LIMIT:
+                chat_id, future = lane.popleft()
+                if future.done():
+                    continue
+                scanned += 1
+
+                blocked = self._blocked.get(chat_id, 0) - now
+                chat_wait = blocked if blocked > 0 else self._buckets.take(chat_id, *self._limit(chat_id), now)
+                if chat_wait:
+                    waiting.append((chat_id, future))
+                    wait = chat_wait if wait is None else min(wait, chat_wait)
+                    continue
+
+                global_wait = self._buckets.take(GLOBAL, *self.global_limit, now)
+                if global_wait:
+                    self._buckets.refund(chat_id)
+                    lane.appendleft((chat_id, future))
+                    for lane_item in reversed(waiting):
+                        lane.appendleft(lane_item)
+                    return global_wait
+                future.set_result(None)
+
+            if lane and scanned >= SCAN_LIMIT:
+                wait = 0.01 if wait is None else min(wait, 0.01)
+            for lane_item in reversed(waiting):
+                lane.appendleft(lane_item)
+        return wait
+
+    def _sweep(self, now: float):
+        self._buckets.sweep(now, self._limit)
+        self._blocked = {chat_id: until for chat_id, until in self._blocked.items() if until > now}
+
+    async def _run(self):
+        next_sweep = time.monotonic() + self.sweep_interval
+        while True:
+            now = time.monotonic()
+            if now >= next_sweep:
+                self._sweep(now)
+                next_sweep = now + self.sweep_interval
+
+            self._wakeup.clear()
+            wait = self._grant(now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for lane in self.lanes:
+            while lane:
+                _, future = lane.popleft()
+                future.cancel()
+
+class OutboundMiddleware(BaseRequestMiddleware):
+    """
+    Пропускает все send*/copy/forward-запросы бота через OutboundLimiter и
+    повторяет их после ответа 429 с учетом retry_after
+    """
+    def __init__(self, limiter: OutboundLimiter, max_retries: int = None):
+        self.limiter = limiter
+        self.max_retries = config.OUTBOUND_MAX_RETRIES if max_retries is None else max_retries
+
+    async def __call__(self, make_request, bot: Bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None or not type(method).__name__.startswith(('Send', 'Copy', 'Forward')):
+            return await make_request(bot, method)
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                outbound_retries.inc()
+                logger.warning(f"Лимит Telegram для чата {chat_id}, повтор через {e.retry_after} с")
+                self.limiter.block(chat_id, e.retry_after)
+
+outbound_limiter = OutboundLimiter()
+
+async def broadcast(bot: Bot, chat_ids: Iterable, text: str, concurrency: int = None) -> dict:
+    """
+    Рассылка с низким приоритетом: ответы пользователям не ждут за ней в очереди.
+    Список чатов читается по мере отправки, в памяти не больше concurrency сообщений
+    """
+    chats = iter(chat_ids)
+    stats = {'sent': 0, 'failed': 0}
+
+    async def sender():
+        with bulk_priority():
+            for chat_id in chats:
+                try:
+                    await bot.send_message(chat_id, text)
+                    stats['sent'] += 1
+                except TelegramAPIError as e:
+                    stats['failed'] += 1
+                    logger.warning(f"Рассылка: не доставлено в чат {chat_id}: {e}")
+
+    await asyncio.gather(*[sender() for _ in range(concurrency or config.OUTBOUND_QUEUE_SIZE)])
+    return stats
@@ -0,0 +1,42 @@
+from typing import Callable, Dict, Hashable, Tuple
+
+class TokenBuckets:
+    """
+    Корзины токенов в одном словаре: ключ -> [токены, время последнего обновления].
+    Корзины, которые успели бы наполниться до краев, удаляются при очистке
+    """
+    def __init__(self):
+        self._buckets: Dict[Hashable, list] = {}
+
+    def take(self, key: Hashable, rate: float, capacity: float, now: float) -> float:
+        """
+        Забирает токен; возвращает 0 при успехе или сколько секунд ждать следующего
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [capacity - 1, now]
+            return 0.0
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+    def refund(self, key: Hashable):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] += 1
+
+    def sweep(self, now: float, limits: Callable[[Hashable], Tuple[float, float]]) -> int:
+        stale = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * limits(key)[0] >= limits(key)[1]
+        ]
+        for key in stale:
+            del self._buckets[key]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -1,64 +1,151 @@
-from typing import List, Dict
-import random
-from datetime import datetime
+import math
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Tuple
+
+LOW_CALORIE_FOODS = {
+    'огурец': 15,
+    'помидор': 18,
+    'салат листовой': 14,
+    'редис': 16,
+    'сельдерей': 12,
+    'шпинат': 23,
+    'капуста белокочанная': 25,
+    'брокколи': 34,
+    'цветная капуста': 30,
+    'кабачок': 24,
+    'перец болгарский': 27,
+    'спаржа': 20,
+    'грибы шампиньоны': 27,
+    'яблоко': 52,
+    'груша': 57,
+    'апельсин': 43,
+    'грейпфрут': 42,
+    'клубника': 41,
+    'малина': 52,
+    'черника': 57,
+    'арбуз': 30,
+    'дыня': 35,
+    'греческий йогурт 0%': 59,
+    'творог обезжиренный': 73,
+    'кефир 1%': 40,
+    'яйцо вареное': 155,
+    'куриная грудка': 165,
+    'рыба треска': 78,
+    'креветки': 99,
+    'тофу': 76
+}
+
+PORTIONS = (50, 100, 150, 200, 250, 300)
+CALORIE_STEP = 10
+MAX_CALORIES = 3000
+MIN_ITEMS = 2
+MAX_ITEMS = 4
+TOLERANCE = 0.1
+
+class Portion(NamedTuple):
+    food: str
+    grams: int
+    calories: float
+    bucket: int
+
+class MealPlanner:
+    """
+    Порции продуктов, отсортированные по калорийности, и таблица динамического
+    программирования: для каждого числа продуктов k и корзины калорий (шаг
+    CALORIE_STEP) хранится одна комбинация из k разных продуктов с такой суммой
+    """
+    def __init__(self, foods: Dict[str, float], portions: tuple = PORTIONS, max_calories: int = MAX_CALORIES):
+        self.portions = sorted(
+            (Portion(food, grams, calories * grams / 100, round(calories * grams / 100 / CALORIE_STEP))
+             for food, calories in foods.items() for grams in portions),
+            key=lambda portion: portion.calories
+        )
+        self.max_bucket = max_calories // CALORIE_STEP
+        self.table = self._build()
+        self.limit_bucket = max(max(layer) for layer in self.table[MIN_ITEMS:] if layer)
+
+    def _build(self) -> List[Dict[int, Tuple[int, ...]]]:
+        """
+        Групповой рюкзак: каждый продукт рассматривается один раз, и k-й слой
+        дополняется его порциями к (k-1)-му слою, еще не содержащему этот продукт.
+        Поэтому продукты в комбинации различны, а достижимые суммы найдены все
+        """
+        by_food = {}
+        for index, portion in enumerate(self.portions):
+            if portion.bucket <= self.max_bucket:
+                by_food.setdefault(portion.food, []).append(index)
+
+        table = [{0: ()}] + [{} for _ in range(MAX_ITEMS)]
+        for indices in by_food.values():
+            for items in range(MAX_ITEMS, 0, -1):
+                layer = table[items]
+                for bucket, combo in table[items - 1].items():
+                    for index in indices:
+                        total = bucket + self.portions[index].bucket
+                        if total <= self.max_bucket and total not in layer:
+                            layer[total] = combo + (index,)
+        return table
+
+    @property
+    def limit_calories(self) -> int:
+        """
+        Наибольшая сумма калорий, которую можно набрать из MAX_ITEMS продуктов
+        """
+        return self.limit_bucket * CALORIE_STEP
+
+    def _calories(self, combo: Tuple[int, ...]) -> float:
+        return sum(self.portions[index].calories for index in combo)
+
+    def _closest(self, items: int, target: float, low: float, high: float):
+        """
+        Комбинация из items продуктов с настоящей суммой калорий в [low, high],
+        ближайшей к target. Корзины округлены, поэтому окно по ним шире на
+        ошибку округления, а допуск проверяется по точной сумме
+        """
+        layer = self.table[items]
+        first = max(0, math.floor(low / CALORIE_STEP) - items)
+        last = math.ceil(high / CALORIE_STEP) + items
+        candidates = [
+            layer[bucket] for bucket in range(first, last + 1)
+            if bucket in layer and low <= self._calories(layer[bucket]) <= high
+        ]
+        return min(candidates, key=lambda combo: abs(self._calories(combo) - target), default=None)
+
+    def plans(self, target_bucket: int) -> List[Tuple[Portion, ...]]:
+        """
+        По одной комбинации из 2, 3 и 4 продуктов, ближайшей к цели в пределах
+        допуска; если таких нет — самая близкая снизу
+        """
+        target = min(target_bucket, self.max_bucket) * CALORIE_STEP
+        spread = max(CALORIE_STEP, target * TOLERANCE)
+        found = [
+            self._closest(items, target, target - spread, target + spread)
+            for items in range(MIN_ITEMS, MAX_ITEMS + 1)
+        ]
+        combos = [combo for combo in found if combo]
+        if not combos:
+            fallback = max(
+                (self._closest(items, target, 0, target) or () for items in range(MIN_ITEMS, MAX_ITEMS + 1)),
+                key=self._calories
+            )
+            combos = [fallback] if fallback else []
+        return [tuple(self.portions[index] for index in sorted(combo)) for combo in combos]
+
+def format_plan(plan: Tuple[Portion, ...]) -> str:
+    items = " + ".join(f"{portion.food} {portion.grams} г" for portion in plan)
+    return f"{items} ≈ {sum(portion.calories for portion in plan):.0f} ккал"
+
+@lru_cache(maxsize=1)
+def get_planner() -> MealPlanner:
+    return MealPlanner(LOW_CALORIE_FOODS)
+
+@lru_cache(maxsize=MAX_CALORIES // CALORIE_STEP + 1)
+def _recommendations_for_bucket(bucket: int) -> Tuple[str, ...]:
+    return tuple(format_plan(plan) for plan in get_planner().plans(bucket))
+
+def get_plan_calorie_limit() -> int:
+    return get_planner().limit_calories
 
 def get_low_calorie_recommendations(remaining_calories: float) -> List[str]:
-    low_calorie_foods = {
-        'огурец': 15,
-        'помидор': 18,
-        'салат листовой': 14,
-        'редис': 16,
-        'сельдерей': 12,
-        'шпинат': 23,
-        'капуста белокочанная': 25,
-        'брокколи': 34,
-        'цветная капуста': 30,
-        'кабачок': 24,
-        'перец болгарский': 27,
-        'спаржа': 20,
-        'грибы шампиньоны': 27,
-        'яблоко': 52,
-        'груша': 57,
-        'апельсин': 43,
-        'грейпфрут': 42,
-        'клубника': 41,
-        'малина': 52,
-        'черника': 57,
-        'арбуз': 30,
-        'дыня': 35,
-        'греческий йогурт 0%': 59,
-        'творог обезжиренный': 73,
-        'кефир 1%': 40,
-        'яйцо вареное': 155,
-        'куриная грудка': 165,
-        'рыба треска': 78,
-        'креветки': 99,
-        'тофу': 76
-    }
-    
-    recommendations = []
-    
-    if remaining_calories < 100:
-        very_low_calorie = {k: v for k, v in low_calorie_foods.items() if v < 50}
-        if very_low_calorie:
-            for food, calories in list(very_low_calorie.items())[:3]:
-                recommendations.append(f"{food}: {calories} ккал/100г")
-    
-    elif remaining_calories <= 300:
-        for food, calories in low_calorie_foods.items():
-            if calories <= remaining_calories * 0.3:
-                recommendations.append(f"{food}: {calories} ккал/100г")
-    
-    else:
-        for food, calories in low_calorie_foods.items():
-            if calories <= remaining_calories * 0.2:
-                recommendations.append(f"{food}: {calories} ккал/100г")
-    
-    if len(recommendations) < 3:
-        all_foods = list(low_calorie_foods.items())
-        random.shuffle(all_foods)
-        for food, calories in all_foods[:3 - len(recommendations)]:
-            if f"{food}: {calories} ккал/100г" not in recommendations:
-                recommendations.append(f"{food}: {calories} ккал/100г")
-    
-    return recommendations[:3]
\ No newline at end of file
+    bucket = min(round(max(0, remaining_calories) / CALORIE_STEP), MAX_CALORIES // CALORIE_STEP)
+    return list(_recommendations_for_bucket(bucket))
@@ -1,8 +1,36 @@
-import aiohttp
 from config import config
+from services.cache import TTLCache, SingleFlight
+from services.http_client import http_client
+from metrics import api_latency, api_errors, timed
 
-async def get_weather(city: str) -> dict:    
-    url = "http://api.openweathermap.org/data/2.5/weather"
+weather_cache = TTLCache(config.WEATHER_CACHE_SIZE, config.WEATHER_CACHE_TTL)
+_in_flight = SingleFlight()
+
+def normalize_city(city: str) -> str:
+    return ' '.join(city.lower().replace('ё', 'е').split())
+
+async def get_weather(city: str) -> dict:
+    key = normalize_city(city)
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
+    return dict(await _in_flight.do(key, lambda: _refresh_weather(key, city)))
+
+async def _refresh_weather(key: str, city: str) -> dict:
+    weather = await fetch_weather(city)
+    if weather.get('success', False):
+        weather_cache.set(key, weather)
+        return weather
+    
+    stale = weather_cache.get_stale(key)
+    if stale is not None:
+        return {**stale, 'stale': True}
+    return weather
+
+@timed(api_latency, 'openweather')
+async def fetch_weather(city: str) -> dict:
+    url = config.OPENWEATHER_URL
     params = {
         'q': city,
         'appid': config.WEATHER_API_KEY,
@@ -11,7 +39,7 @@ async def get_weather(city: str) -> dict:
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client() as session:
             async with session.get(url, params=params) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -19,9 +47,12 @@ async def get_weather(city: str) -> dict:
                         'temperature': data['main']['temp'],
                         'description': data['weather'][0]['description'],
                         'city': data['name'],
+                        'utc_offset': data.get('timezone'),
                         'success': True
                     }
                 else:
+                    api_errors.inc('openweather')
                     return {"temperature": 20, "error": f"API error: {response.status}"}
     except Exception as e:
+        api_errors.inc('openweather')
         return {"temperature": 20, "error": str(e)}
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Ленивый сброс дневных счетчиков: после смены дня счетчики читаются как 0,
+таблица users не переписывается целиком, а первые записи нового дня не дают
+всплеска задержки.
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+USERS = 100000
+WRITES = 500
+CONCURRENCY = 20
+# полный UPDATE users на 100 тыс. строк, идущий вместе с 20 писателями, поднимает
+# их p99 в 5-8 раз; сравниваются два прогона в одном окружении, а не абсолютное
+# время, которое зависит от машины
+SPIKE_RATIO = 2
+
+@pytest.fixture
+def yesterday_db(tmp_path, monkeypatch):
+    """
+    База, где у всех пользователей накоплены счетчики за вчера: такое состояние
+    она имеет в первые секунды после полуночи
+    """
+    path = str(tmp_path / "rollover.db")
+    monkeypatch.setattr(database, "DB_PATH", path)
+    monkeypatch.setattr(database, "write_behind", None)
+    database.user_cache.clear()
+    yesterday = (date.fromisoformat(database.user_day()) - timedelta(days=1)).isoformat()
+
+    async def setup():
+        await database.init_db()
+        await database.open_pool(path)
+        async with database.pool.writer() as db:
+            await db.executemany(
+                "INSERT INTO users (user_id, weight, water_goal, logged_water, logged_calories, "
+                "burned_calories, counters_day) VALUES (?, 70, 2500, 1000, 1500, 300, ?)",
+                [(user_id, yesterday) for user_id in range(USERS)]
+            )
+            await db.commit()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(setup())
+    yield loop, yesterday
+    loop.run_until_complete(database.close_pool())
+    loop.close()
+    database.user_cache.clear()
+
+async def _users_on_day(day: str) -> int:
+    async with database.pool.reader() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM users WHERE counters_day = ?", (day,))
+        return (await cursor.fetchone())[0]
+
+def test_counters_read_as_zero_after_day_change(yesterday_db):
+    loop, _ = yesterday_db
+    user = loop.run_until_complete(database.get_user(42))
+    assert all(user[column] == 0 for column in database.COUNTER_COLUMNS)
+    assert user['counters_day'] == database.user_day()
+
+def test_first_write_of_new_day_starts_from_zero(yesterday_db):
+    loop, _ = yesterday_db
+
+    async def scenario():
+        await database.log_water(7, 250)
+        database.user_cache.clear()
+        return await database.get_user(7)
+
+    user = loop.run_until_complete(scenario())
+    assert user['logged_water'] == 250
+    assert user['logged_calories'] == 0
+    assert user['burned_calories'] == 0
+
+def test_day_change_does_not_rewrite_users_table(yesterday_db):
+    loop, yesterday = yesterday_db
+
+    async def scenario():
+        for user_id in range(WRITES):
+            await database.log_water(user_id, 250)
+        return await _users_on_day(yesterday), await _users_on_day(database.user_day())
+
+    untouched, rolled = loop.run_until_complete(scenario())
+    assert rolled == WRITES
+    assert untouched == USERS - WRITES
+
+def _p99(latencies: list) -> float:
+    latencies = sorted(latencies)
+    return latencies[int(len(latencies) * 0.99) - 1]
+
+async def _write_new_day(offset: int, sweep: bool = False) -> list:
+    """
+    WRITES записей воды от CONCURRENCY писателей; при sweep одновременно с ними
+    идет прежний полуночный UPDATE всей таблицы users
+    """
+    latencies = []
+    step = USERS // WRITES
+
+    async def writer(first: int):
+        for user_id in range(first * step + offset, USERS, CONCURRENCY * step):
+            start = time.perf_counter()
+            await database.log_water(user_id, 250)
+            latencies.append(time.perf_counter() - start)
+
+    async def global_sweep():
+        async with database.pool.writer() as db:
+            await db.execute(
+                "UPDATE users SET logged_water = 0, logged_calories = 0, burned_calories = 0, counters_day = ?",
+                (database.user_day(),)
+            )
+            await db.commit()
+
+    jobs = [global_sweep()] if sweep else []
+    await asyncio.gather(*jobs, *[writer(first) for first in range(CONCURRENCY)])
+    return latencies
+
+def test_no_latency_spike_on_day_change(yesterday_db):
+    loop, _ = yesterday_db
+    lazy = _p99(loop.run_until_complete(_write_new_day(0)))
+    swept = _p99(loop.run_until_complete(_write_new_day(1, sweep=True)))
+    assert lazy * SPIKE_RATIO < swept, (
+        f"первые записи нового дня: p99 {lazy * 1000:.1f} мс без сброса, "
+        f"{swept * 1000:.1f} мс с полным UPDATE users"
+    )
@@ -0,0 +1,62 @@
+"""
+Перезапуск упавшего воркера: процесс, убитый во время ожидания апдейта,
+оставляет блокировку чтения своей очереди захваченной, поэтому новый воркер
+должен получить новую очередь и продолжать получать апдейты своего шарда.
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workers import WorkerPool, shard_key
+
+TIMEOUT = 30
+
+def _echo(results, index, updates):
+    results.put(('ready', index))
+    while True:
+        item = updates.get()
+        if item is None:
+            break
+        results.put(('update', item[1]['update_id']))
+
+def _wait_for(results, kind: str):
+    while True:
+        event = results.get(timeout=TIMEOUT)
+        if event[0] == kind:
+            return event[1]
+
+def _message(update_id: int, user_id: int) -> dict:
+    return {'update_id': update_id, 'message': {'from': {'id': user_id}, 'chat': {'id': user_id}}}
+
+def test_killed_worker_shard_keeps_receiving_updates():
+    results = multiprocessing.get_context('spawn').Queue()
+    pool = WorkerPool(2, target=partial(_echo, results))
+
+    async def scenario():
+        pool.start()
+        supervisor = asyncio.create_task(pool.supervise(0.1))
+        try:
+            ready = {await asyncio.to_thread(_wait_for, results, 'ready') for _ in range(2)}
+            assert ready == {0, 1}
+
+            update = _message(1, 42)
+            index = hash(shard_key(update)) % 2
+            killed = pool._processes[index]
+            # воркер простаивает в updates.get(), держа блокировку чтения очереди
+            await asyncio.sleep(0.5)
+            os.kill(killed.pid, signal.SIGKILL)
+            assert await asyncio.to_thread(_wait_for, results, 'ready') == index
+            assert pool._processes[index] is not killed
+
+            await pool.dispatch(update)
+            assert await asyncio.to_thread(_wait_for, results, 'update') == 1
+        finally:
+            supervisor.cancel()
+            await pool.stop(TIMEOUT)
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import secrets
+from typing import Awaitable, Callable
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from config import config
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+def in_flight_limit(limit: int):
+    """
+    Ограничивает число одновременно обрабатываемых апдейтов
+    """
+    slots = asyncio.Semaphore(limit)
+    
+    @web.middleware
+    async def middleware(request: web.Request, handler):
+        async with slots:
+            return await handler(request)
+    
+    return middleware
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, **data) -> web.Application:
+    app = web.Application(middlewares=[in_flight_limit(config.WEBHOOK_MAX_IN_FLIGHT)])
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=False,
+        secret_token=config.WEBHOOK_SECRET or None,
+        **data
+    ).register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot, **data)
+    return app
+
+def create_front_app(dispatch: Callable[[dict], Awaitable[None]]) -> web.Application:
+    """
+    Вебхук фронтового процесса: только проверяет секрет и передает сырой апдейт воркерам
+    """
+    async def handle(request: web.Request) -> web.Response:
+        if config.WEBHOOK_SECRET and not secrets.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), config.WEBHOOK_SECRET
+        ):
+            return web.Response(body="Unauthorized", status=401)
+        await dispatch(await request.json())
+        return web.Response()
+    
+    app = web.Application(middlewares=[in_flight_limit(config.WEBHOOK_MAX_IN_FLIGHT)])
+    app.router.add_post(config.WEBHOOK_PATH, handle)
+    return app
+
+async def set_webhook(bot: Bot, allowed_updates: list = None):
+    if config.WEBHOOK_URL:
+        await bot.set_webhook(
+            url=config.WEBHOOK_URL.rstrip('/') + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET or None,
+            max_connections=config.WEBHOOK_MAX_IN_FLIGHT,
+            allowed_updates=allowed_updates
+        )
+
+async def serve_app(app: web.Application):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"Вебхук слушает {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    await set_webhook(bot, dp.resolve_used_update_types())
+    await serve_app(create_webhook_app(dp, bot))
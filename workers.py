@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+from aiogram import Bot
+from config import config
+from bootstrap import start_services, stop_services, create_bot, create_dispatcher
+from webhook import create_front_app, set_webhook, serve_app
+from log_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def shard_key(update: dict) -> int:
+    """
+    Ключ шардирования — id пользователя, а если его нет — id чата или апдейта
+    """
+    for field, event in update.items():
+        if field == 'update_id' or not isinstance(event, dict):
+            continue
+        user = event.get('from') or event.get('user') or {}
+        if user.get('id') is not None:
+            return user['id']
+        chat = event.get('chat') or (event.get('message') or {}).get('chat') or {}
+        if chat.get('id') is not None:
+            return chat['id']
+    return update['update_id']
+
+class UserSerializer:
+    """
+    Апдейты одного пользователя обрабатываются строго по очереди одной задачей,
+    разных пользователей — параллельно, но не больше limit обработчиков сразу.
+    Слот занимается только на время обработки, поэтому очередь одного пользователя
+    не задерживает остальных. У пользователя в очереди не больше backlog апдейтов,
+    лишние отбрасываются; всего ожидает не больше queue_size апдейтов
+    """
+    def __init__(self, handle: Callable[[dict], Awaitable[None]], limit: int,
+                 backlog: int = None, queue_size: int = None):
+        self._handle = handle
+        self._pending = {}
+        self._runners = {}
+        self._capacity = asyncio.Semaphore(limit)
+        self._space = asyncio.Semaphore(config.WORKER_QUEUE_SIZE if queue_size is None else queue_size)
+        self.backlog = config.WORKER_USER_BACKLOG if backlog is None else backlog
+
+    async def submit(self, key: Hashable, update: dict):
+        pending = self._pending.get(key)
+        if pending is not None and len(pending) >= self.backlog:
+            logger.warning(f"Очередь пользователя {key} переполнена, апдейт {update.get('update_id')} отброшен")
+            return
+        await self._space.acquire()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = deque()
+            self._runners[key] = asyncio.create_task(self._run(key, pending))
+        pending.append(update)
+
+    async def _run(self, key: Hashable, pending: deque):
+        try:
+            while pending:
+                update = pending.popleft()
+                self._space.release()
+                async with self._capacity:
+                    try:
+                        await self._handle(update)
+                    except Exception as e:
+                        logger.error(f"Ошибка обработки апдейта {update.get('update_id')}: {e}")
+        finally:
+            for _ in pending:
+                self._space.release()
+            del self._pending[key]
+            del self._runners[key]
+
+    async def drain(self):
+        while self._runners:
+            await asyncio.gather(*list(self._runners.values()), return_exceptions=True)
+
+def worker_main(index: int, updates: multiprocessing.Queue):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    log_listener = setup_logging(f"{config.LOG_FILE}.worker-{index}")
+    try:
+        asyncio.run(_worker(index, updates))
+    finally:
+        log_listener.stop()
+
+async def _worker(index: int, updates: multiprocessing.Queue):
+    metrics_port = config.METRICS_PORT + 1 + index if config.METRICS_PORT else 0
+    storage = await start_services(metrics_port, scheduled_jobs=index == 0, shard=(index, config.WORKERS))
+    bot = create_bot()
+    dp = create_dispatcher(storage)
+    serializer = UserSerializer(lambda update: dp.feed_raw_update(bot, update), config.WORKER_MAX_IN_FLIGHT)
+    logger.info(f"Воркер {index} запущен")
+    try:
+        while True:
+            item = await asyncio.to_thread(updates.get)
+            if item is None:
+                break
+            await serializer.submit(*item)
+        await serializer.drain()
+    finally:
+        await bot.session.close()
+        await stop_services(storage)
+
+class WorkerPool:
+    """
+    Процессы-воркеры со своими очередями; апдейт уходит в воркер по хэшу пользователя.
+    Упавший воркер перезапускается с новой очередью: если его убили внутри get(),
+    блокировка чтения старой очереди так и осталась захваченной, и новый воркер
+    из нее ничего бы не получил. Апдейты, ждавшие в старой очереди, теряются
+    """
+    def __init__(self, workers: int, target: Callable[[int, multiprocessing.Queue], None] = worker_main):
+        self._context = multiprocessing.get_context('spawn')
+        self._target = target
+        self._queues = [self._new_queue() for _ in range(workers)]
+        self._processes = [None] * workers
+        self._stopping = False
+
+    def _new_queue(self) -> multiprocessing.Queue:
+        return self._context.Queue(config.WORKER_QUEUE_SIZE)
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=self._target,
+            args=(index, self._queues[index]),
+            name=f"bot-worker-{index}"
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _respawn(self, index: int):
+        old = self._queues[index]
+        self._queues[index] = self._new_queue()
+        try:
+            lost = old.qsize()
+        except NotImplementedError:
+            lost = None
+        if lost:
+            logger.warning(f"Потеряно апдейтов из очереди воркера {index}: {lost}")
+        old.cancel_join_thread()
+        old.close()
+        self._spawn(index)
+
+    def start(self):
+        for index in range(len(self._processes)):
+            self._spawn(index)
+
+    async def supervise(self, interval: float = 1.0):
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            for index, process in enumerate(self._processes):
+                if not process.is_alive() and not self._stopping:
+                    logger.warning(f"Воркер {index} завершился с кодом {process.exitcode}, перезапуск")
+                    self._respawn(index)
+
+    async def dispatch(self, update: dict, retry_interval: float = 1.0):
+        """
+        При полной очереди ждет место; очередь перечитывается после каждого
+        таймаута, чтобы не зависнуть на очереди перезапущенного воркера
+        """
+        key = shard_key(update)
+        index = hash(key) % len(self._queues)
+        while True:
+            updates = self._queues[index]
+            try:
+                updates.put_nowait((key, update))
+                return
+            except queue.Full:
+                pass
+            except ValueError:
+                # очередь закрыли при перезапуске воркера
+                continue
+            try:
+                await asyncio.to_thread(updates.put, (key, update), True, retry_interval)
+                return
+            except (queue.Full, ValueError):
+                continue
+
+    async def stop(self, timeout: float = 30):
+        self._stopping = True
+        for updates in self._queues:
+            await asyncio.to_thread(updates.put, None)
+        for process in self._processes:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                process.terminate()
+
+async def poll_updates(bot: Bot, dispatch: Callable[[dict], Awaitable[None]]):
+    await bot.delete_webhook()
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=config.POLLING_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Ошибка получения апдейтов: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            await dispatch(update.model_dump(mode='json', by_alias=True, exclude_none=True))
+            offset = update.update_id + 1
+
+async def run_sharded(workers: int):
+    pool = WorkerPool(workers)
+    pool.start()
+    supervisor = asyncio.create_task(pool.supervise())
+    bot = create_bot()
+    try:
+        if config.BOT_MODE == "webhook":
+            await set_webhook(bot)
+            await serve_app(create_front_app(pool.dispatch))
+        else:
+            await poll_updates(bot, pool.dispatch)
+    finally:
+        supervisor.cancel()
+        await pool.stop()
+        await bot.session.close()